@@ -0,0 +1 @@
+"""Micro-benchmarks for iapp_v0 algorithms."""
@@ -0,0 +1,154 @@
+"""
+液位识别分阶段基准测试, 使用合成图像, 结果输出为 JSON 便于不同版本间对比
+Usage:
+    python -m benchmarks.bench_liquid_level --output bench.json
+    python -m benchmarks.bench_liquid_level --quick --compare bench.json
+"""
+import argparse
+import itertools
+import json
+import platform
+import statistics
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from benchmarks.synthetic import LIQUID_COLORS, sight_glass
+from iapp_v0.algorithm.base.algorithm_base import AlgorithmInput, AlgorithmInstance
+from iapp_v0.algorithm.liquid_level.ab_liquid_level_reco_primary import LiquidLevelRecoPrimary
+from iapp_v0.algorithm.liquid_level.ab_liquid_level_reco_secondary import LiquidLevelRecoSecondary
+from iapp_v0.constant.constant import AlgorithmClassifyEnum, AlgorithmStrategyEnum, AlgorithmOutputTypeEnum, \
+    ColorSeriesEnum
+
+RESOLUTIONS = ((640, 480), (1280, 720), (1920, 1080), (3840, 2160))
+NOISE_LEVELS = (0.0, 8.0, 20.0)
+LEVEL = 0.6
+
+# 各算法分类依次执行的阶段: (阶段名, 调用)
+STAGES = {
+    AlgorithmClassifyEnum.Primary: (
+        ("_img_cut", lambda reco, ctx: reco._img_cut(ctx)),
+        ("_img_threshold_by_color",
+         lambda reco, ctx: reco._img_threshold_by_color(ctx, ColorSeriesEnum.from_str(ctx.inputs["colorSeries"]))),
+        ("_img_contours", lambda reco, ctx: reco._img_contours(ctx)),
+        ("_do_detect", lambda reco, ctx: reco._do_detect(ctx, ctx.instance.classify, ctx.instance.strategy)),
+        ("gen_result_img", lambda reco, ctx: reco.gen_result_img(ctx)),
+    ),
+    AlgorithmClassifyEnum.Secondary: (
+        ("_img_cut", lambda reco, ctx: reco._img_cut(ctx)),
+        ("_img_threshold", lambda reco, ctx: reco._img_threshold(ctx)),
+        ("_img_contours", lambda reco, ctx: reco._img_contours(ctx)),
+        ("_do_detect", lambda reco, ctx: reco._do_detect(ctx, ctx.instance.classify, ctx.instance.strategy)),
+        ("gen_result_img", lambda reco, ctx: reco.gen_result_img(ctx)),
+    ),
+}
+ALGORITHMS = {
+    AlgorithmClassifyEnum.Primary: LiquidLevelRecoPrimary,
+    AlgorithmClassifyEnum.Secondary: LiquidLevelRecoSecondary,
+}
+
+
+def _summary(samples: list[float]) -> dict:
+    """耗时统计(毫秒)"""
+    return {"min_ms": round(min(samples) * 1000, 4),
+            "median_ms": round(statistics.median(samples) * 1000, 4),
+            "mean_ms": round(statistics.fmean(samples) * 1000, 4)}
+
+
+def bench_case(classify: AlgorithmClassifyEnum, resolution: tuple, color: str, noise: float, repeat: int) -> dict:
+    """
+    单个用例: 各阶段分别计时(每轮使用新的上下文), 另计完整 perform 的耗时
+    """
+    glass = sight_glass(*resolution, color=color, level=LEVEL, noise=noise)
+    instance = AlgorithmInstance(classify, AlgorithmStrategyEnum.Main, AlgorithmOutputTypeEnum.ValueQuality)
+    inputs = AlgorithmInput(glass.inputs(color))
+    reco = ALGORITHMS[classify](inputs)
+    stages = STAGES[classify]
+
+    samples = {name: [] for name, _ in stages}
+    samples["perform"] = []
+    reading, error = None, None
+    for _ in range(repeat):
+        ctx = reco._new_context(instance, inputs)
+        try:
+            for name, stage in stages:
+                start = time.perf_counter()
+                stage(reco, ctx)
+                samples[name].append(time.perf_counter() - start)
+        except Exception as e:
+            # 识别失败的用例只记录失败原因
+            error = getattr(e, "message", repr(e))
+            break
+        start = time.perf_counter()
+        reading = reco.perform(instance)[1]
+        samples["perform"].append(time.perf_counter() - start)
+
+    return {"classify": classify.name, "width": resolution[0], "height": resolution[1], "color": color,
+            "noise": noise, "expected": round(glass.expected, 4),
+            "reading": None if reading is None else round(float(reading), 4), "error": error,
+            "stages": {name: _summary(values) for name, values in samples.items() if values}}
+
+
+def run(resolutions=RESOLUTIONS, colors=tuple(LIQUID_COLORS), noise_levels=NOISE_LEVELS, repeat: int = 20) -> dict:
+    cases = []
+    for classify, resolution, color, noise in itertools.product(ALGORITHMS, resolutions, colors, noise_levels):
+        cases.append(bench_case(classify, resolution, color, noise, repeat))
+    return {"meta": {"python": platform.python_version(), "opencv": cv2.__version__, "numpy": np.__version__,
+                     "platform": platform.platform(), "processor": platform.processor(),
+                     "cv_threads": cv2.getNumThreads(), "repeat": repeat,
+                     "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+            "cases": cases}
+
+
+def compare(current: dict, baseline: dict) -> list[str]:
+    """
+    与基线结果对比各阶段中位数耗时, 返回可读的对比行
+    """
+
+    def key(case):
+        return case["classify"], case["width"], case["height"], case["color"], case["noise"]
+
+    base_cases = {key(case): case for case in baseline["cases"]}
+    lines = []
+    for case in current["cases"]:
+        base = base_cases.get(key(case))
+        if base is None:
+            continue
+        for name, stat in case["stages"].items():
+            base_stat = base["stages"].get(name)
+            if base_stat is None or not base_stat["median_ms"]:
+                continue
+            ratio = stat["median_ms"] / base_stat["median_ms"]
+            lines.append(f"{'/'.join(map(str, key(case)))} {name}: "
+                         f"{base_stat['median_ms']:.3f} -> {stat['median_ms']:.3f} ms ({ratio:.2f}x)")
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="liquid level per-stage benchmark")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--quick", action="store_true", help="single resolution/color/noise level")
+    parser.add_argument("--output", help="write JSON results to this file (default: stdout)")
+    parser.add_argument("--compare", help="baseline JSON results to compare against")
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        results = run(RESOLUTIONS[:1], ("Red",), NOISE_LEVELS[:1], args.repeat)
+    else:
+        results = run(repeat=args.repeat)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print("\n".join(compare(results, json.load(f))), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
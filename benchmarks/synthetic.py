@@ -0,0 +1,65 @@
+"""
+合成液位计图像, 基准测试与回归测试无需外部图片
+"""
+import numpy as np
+
+# 液柱颜色(BGR)
+LIQUID_COLORS = {
+    "Red": (30, 30, 200),
+    "Green": (40, 170, 40),
+    "Blue": (190, 60, 20),
+    "Yellow": (30, 200, 220),
+}
+# 默认量程
+RANGE_UP, RANGE_DOWN = 100, 0
+
+
+class SightGlass(object):
+    """
+    合成的液位计图像及其输入参数
+    :img BGR 图像
+    :column 液柱四个顶点(左上、左下、右下、右上)
+    :level 液位高度占液柱高度的比例
+    :expected 按量程换算的理论读数
+    """
+
+    def __init__(self, img, column, level):
+        self.img = img
+        self.column = column
+        self.level = level
+        self.expected = RANGE_DOWN + level * (RANGE_UP - RANGE_DOWN)
+
+    def inputs(self, color: str = "Red") -> dict:
+        (x0, y0), _, (x1, y1), _ = self.column
+        return {"imgPath": self.img,
+                "colorSeries": color,
+                "rangeUp": RANGE_UP, "rangeDown": RANGE_DOWN,
+                "thresholdUpper": [(x0 + x1) // 2, y0 + (y1 - y0) // 4],
+                "thresholdLower": [(x0 + x1) // 2, y0 + (y1 - y0) * 3 // 4],
+                "column": [list(point) for point in self.column],
+                "outputType": "ValueQuality"}
+
+
+def sight_glass(width: int = 640, height: int = 480, color: str = "Red", level: float = 0.5, noise: float = 0.0,
+                seed: int = 0) -> SightGlass:
+    """
+    生成液位计图像: 灰色背景上的竖直玻璃管, 管内下部为指定颜色的液柱
+    params:
+        level: 液位高度占液柱高度的比例
+        noise: 高斯噪声标准差(灰度级)
+    """
+    rng = np.random.default_rng(seed)
+    img = np.empty((height, width, 3), dtype=np.uint8)
+    # 自上而下渐变的背景
+    img[:] = np.linspace(90, 140, height, dtype=np.uint8)[:, None, None]
+
+    # 玻璃管: 高度为图像的 70%, 宽度为图像的 4%
+    x0, x1 = int(width * 0.48), int(width * 0.52)
+    y0, y1 = int(height * 0.15), int(height * 0.85)
+    img[y0:y1, x0:x1] = (225, 225, 225)
+    surface = y1 - int(round((y1 - y0) * level))
+    img[surface:y1, x0:x1] = LIQUID_COLORS[color]
+
+    if noise > 0:
+        img = np.clip(img + rng.normal(0, noise, img.shape), 0, 255).astype(np.uint8)
+    return SightGlass(img, ((x0, y0), (x0, y1), (x1, y1), (x1, y0)), (y1 - surface) / (y1 - y0))
@@ -0,0 +1,87 @@
+from iapp_v0.constant.alarm import ExceedLimitAlarmRule
+
+# 越限报警等级, 下标即等级索引(同时作为描述索引)
+EXCEED_LEVELS = ("HH", "H", "L", "LL")
+# 等级索引: 无报警
+NO_ALARM = -1
+# 默认报警描述, 与 EXCEED_LEVELS 一一对应
+EXCEED_DEFAULT_TXT = ("越高高限报警", "越高限报警", "越低限报警", "越低低限报警")
+
+
+def exceed_limit(values, hh_limit, h_limit, l_limit, ll_limit):
+    """
+    批量越限判断, 读数与各限值为标量或可相互广播的数组, 一次向量化计算
+        优先级 HH > H > LL > L, 读数为 NaN 时不报警
+    return:
+        alarm: bool 数组, 是否报警
+        level: int8 数组, EXCEED_LEVELS 的下标, 无报警为 NO_ALARM
+    """
+    import numpy as np
+
+    values = np.asarray(values, dtype=np.float64)
+    level = np.select((values >= hh_limit, values >= h_limit, values <= ll_limit, values <= l_limit),
+                      (0, 1, 3, 2), NO_ALARM).astype(np.int8)
+    return level != NO_ALARM, level
+
+
+class ExceedLimitTable(object):
+    """
+    多条越限报警规则的列式存储, 用于大批位号的报警重算(历史回填、规则变更等)
+    Usage:
+        table = ExceedLimitTable(rules)
+        alarm, level = table.evaluate(values)   # values 形状 (n,) 或 (m, n), n 为规则数
+        names, descs = table.describe(level)
+    :rules n 条越限报警规则
+    """
+
+    def __init__(self, rules: list[ExceedLimitAlarmRule]):
+        import numpy as np
+
+        # (n, 4): 高高限, 高限, 低限, 低低限; 规则为空时为 (0, 4), 计算结果为空数组
+        self.limits = np.array([(r.hh_limit, r.h_limit, r.l_limit, r.ll_limit) for r in rules],
+                               dtype=np.float64).reshape(len(rules), len(EXCEED_LEVELS))
+        # (n, 4): 与 EXCEED_LEVELS 对应的报警描述
+        self.texts = np.array([_texts(r) for r in rules], dtype=object).reshape(len(rules), len(EXCEED_LEVELS))
+
+    def __len__(self):
+        return len(self.limits)
+
+    def evaluate(self, values):
+        """
+        return:
+            alarm: bool 数组, 形状同 values
+            level: int8 数组, EXCEED_LEVELS 的下标, 无报警为 NO_ALARM
+        """
+        return exceed_limit(values, *self.limits.T)
+
+    def describe(self, level):
+        """
+        等级索引 -> (等级名, 报警描述), 无报警处为 None
+        """
+        import numpy as np
+
+        level = np.asarray(level)
+        names = np.array((None,) + EXCEED_LEVELS, dtype=object)[level + 1]
+        descs = self.texts[np.arange(len(self)), np.maximum(level, 0)]
+        descs[level == NO_ALARM] = None
+        return names, descs
+
+
+def exceed_limit_alarm(rule: ExceedLimitAlarmRule, val) -> (bool, str, str):
+    """
+    单个读数的越限判断, 与批量计算共用同一实现
+    return:
+        ret : 是否报警
+        level: 报警等级
+        desc: 报警描述
+    """
+    _, level = exceed_limit(val, rule.hh_limit, rule.h_limit, rule.l_limit, rule.ll_limit)
+    level = int(level)
+    if level == NO_ALARM:
+        return False, None, None
+    return True, EXCEED_LEVELS[level], _texts(rule)[level]
+
+
+def _texts(rule: ExceedLimitAlarmRule) -> tuple:
+    return tuple(default if txt is None else txt
+                 for txt, default in zip((rule.hh_txt, rule.h_txt, rule.l_txt, rule.ll_txt), EXCEED_DEFAULT_TXT))
@@ -1,13 +1,20 @@
 import json
 import logging
+import numbers
 import os
+import threading
 from abc import abstractmethod, ABCMeta
+from itertools import repeat
 from types import CodeType
 from typing import Any, Union, AnyStr
 
-from iapp_v0.constant.alarm import AlarmRule, ExceedLimitAlarmRule
+from iapp_v0.algorithm.base.alarm_engine import exceed_limit_alarm
+from iapp_v0.algorithm.base.output_template import compile_output_template
+from iapp_v0.algorithm.base.result_cache import ResultCache, source_digest
+from iapp_v0.constant.alarm import AlarmRule, ExceedLimitAlarmRule, TrendAlarmRule
 from iapp_v0.constant.constant import AlgorithmClassifyEnum, AlgorithmStrategyEnum, AlgorithmOutputTypeEnum
 from iapp_v0.exceptions.custom_exception import AlgorithmCheckException, AlgorithmProcessException
+from iapp_v0.utils.metrics import metrics
 
 """
 写在前面 UML类图请参考
@@ -41,9 +48,13 @@ class AlgorithmOutput:
     :val 识别结果值
     :points 关键点坐标
     :alarm (是否报警，报警等级，报警描述)
+    :error 批量执行时捕获到的单条异常(若有)
+    :carried_forward 画面无变化, 沿用上次识别结果(未重新识别)
+    :precision 读数精度(量程单位), 算法支持且已知时给出
     """
 
-    def __init__(self, ret: bool, val: Any, points: list[tuple], alarm: tuple, level: str, desc: str):
+    def __init__(self, ret: bool, val: Any, points: list[tuple], alarm: tuple, level: str, desc: str,
+                 error: Exception = None, carried_forward: bool = False, precision: float = None):
         self.ret = ret
         self.val = val
         self.points = points
@@ -51,6 +62,9 @@ class AlgorithmOutput:
         self.alarm = alarm
         self.level = level
         self.desc = desc
+        self.error = error
+        self.carried_forward = carried_forward
+        self.precision = precision
 
     def __str__(self):
         return f"ret: {self.ret}, val: {self.val}, points: {self.points}, \
@@ -58,16 +72,39 @@ class AlgorithmOutput:
 
 
 class AlgorithmInstance(object):
+    """
+    算法实例
+    :tag 位号, 有状态的报警规则(偏差/变化率)按位号保存读数历史, 为空时按算法对象区分
+    """
 
     def __init__(self, classify: AlgorithmClassifyEnum, strategy: AlgorithmStrategyEnum,
                  output_type: AlgorithmOutputTypeEnum,
                  out_template: Union[str, bytes, CodeType] = None,
-                 alarm_rule: AlarmRule = None):
+                 alarm_rule: AlarmRule = None, tag: str = None):
         self.classify = classify
         self.strategy = strategy
         self.output_type = output_type
         self.output_template = out_template
         self.alarm_rule = alarm_rule
+        self.tag = tag
+        # 模板在实例创建时编译(并缓存), 模板错误提前抛出
+        if output_type == AlgorithmOutputTypeEnum.ByTemplate and out_template:
+            compile_output_template(out_template)
+
+
+class AlgorithmContext(object):
+    """
+    算法单次调用的执行上下文, 保存本次调用的实例、输入及全部中间结果
+    每次 perform 新建一个上下文, 算法对象本身在构造后不再修改, 同一对象可被多线程同时调用
+    :instance 本次调用的算法实例
+    :inputs 本次调用的算法输入
+    :debug_session 中间过程图片采集会话(若本次调用被采样)
+    """
+
+    def __init__(self, instance: AlgorithmInstance, inputs: AlgorithmInput):
+        self.instance = instance
+        self.inputs = inputs
+        self.debug_session = None
 
 
 class Base(object):
@@ -110,6 +147,72 @@ class AlgorithmParam(Base):
         self.nullable = nullable
 
 
+class ParamValidator(object):
+    """
+    参数校验器, 由算法参数定义预编译得到, 每个算法类只编译一次
+        必填参数为集合, 数值型取值范围按区间校验, 枚举型取值范围按 frozenset 校验
+    """
+
+    def __init__(self, owner: str, params: dict[str, AlgorithmParam], base_params: dict[str, AlgorithmParam] = None):
+        self.owner = owner
+        self.params = params
+        # 可通过 _get_input_value_by_name 读取的全部参数名
+        self.names = frozenset(params) | frozenset(base_params or ())
+        # 按定义顺序保存的必填参数, 保证缺参提示与定义顺序一致
+        self.required = tuple(name for name, define in params.items() if not define.nullable)
+        self.required_set = frozenset(self.required)
+        self.range_checks = {name: self.__compile_range(define) for name, define in params.items()
+                             if len(define.val_range) > 0}
+
+    @staticmethod
+    def __compile_range(define: AlgorithmParam):
+        val_range = tuple(define.val_range)
+        # 数值型参数 [下限, 上限]
+        if define.val_type in (int, float) and len(val_range) == 2:
+            low, high = val_range
+            return lambda value: isinstance(value, numbers.Real) and low <= value <= high
+        try:
+            choices = frozenset(val_range)
+        except TypeError:
+            return val_range.__contains__
+
+        def contains(value):
+            try:
+                return value in choices
+            except TypeError:
+                return value in val_range
+
+        return contains
+
+    def check(self, inputs: dict) -> (bool, str):
+        """
+        参数预检查
+        return:
+            :bool 是否通过
+            :str 校验不通过的异常原因
+        """
+        # 少传参了
+        if not self.required_set.issubset(inputs.keys()):
+            missing = next(name for name in self.required if name not in inputs)
+            return False, f"Missing param named '{missing}' for {self.owner}"
+
+        for input_name, value in inputs.items():
+            if input_name == "kwargs":
+                continue
+            #  1.检查参数是否已预定义
+            if input_name not in self.params:
+                return False, f"Wrong param named '{input_name}' for {self.owner}"
+            # 2. 检查是否可以为空
+            if value is None and input_name in self.required_set:
+                return False, f"Value of '{input_name}' can't be {value}"
+            # 3. 对应参数所传入的值是否在区间内
+            in_range = self.range_checks.get(input_name)
+            if in_range is not None and not in_range(value):
+                return False, f"Value '{value}' of '{input_name}' not in range " \
+                              f"{self.params[input_name].val_range} for {self.owner}"
+        return True, ""
+
+
 class AlgorithmStrategy(Base):
     """
     算法策略
@@ -141,13 +244,22 @@ class AlgorithmBase(Base):
     _base_params: dict[str, AlgorithmParam] = {
         "classify": AlgorithmParam("classify", "算法分类", "算法分类", str, tuple(AlgorithmClassifyEnum.__members__)),
         "strategy": AlgorithmParam("strategy", "算法策略", "算法策略", str, tuple(AlgorithmStrategyEnum.__members__))}
+    # 各算法类预编译的参数校验器
+    __validators: dict[type, ParamValidator] = {}
+    # 执行上下文类型, 由具体算法扩展中间结果字段
+    _context_class = AlgorithmContext
 
     def __init__(self, name, description, cn_name, classify, strategies: list[AlgorithmStrategy],
                  params: dict[str, AlgorithmParam], _id: int = -1):
         super(AlgorithmBase, self).__init__(_id, name, description)
 
-        self._instance = None
         self._inputs = None
+        # 中间过程图片采集(可选), 参考 iapp_v0.utils.debug_capture.DebugCapture
+        self.debug_capture = None
+        # 识别结果缓存(可选), 参考 iapp_v0.algorithm.base.result_cache.ResultCache
+        self.result_cache = None
+        # 各线程最近一次调用的上下文, 供 gen_result_img 等调用后接口使用
+        self._local = threading.local()
 
         self.cn_name = cn_name
         # 支持的算法实例
@@ -157,39 +269,62 @@ class AlgorithmBase(Base):
         # 支持的算法参数
         self.params = params
 
-    def __param_check(self) -> (bool, str):
+    def __getstate__(self):
+        # 结果缓存为进程内状态(含锁), 不随对象传入进程池
+        state = self.__dict__.copy()
+        del state["_local"]
+        state["result_cache"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    def __param_check(self, inputs: AlgorithmInput) -> (bool, str):
         """
         参数预检查
         return:
             :bool 是否通过
             :str 校验不通过的异常原因
         """
+        return self._param_validator().check(inputs)
 
-        # 少传参了
-        for define in self._supported_params().values():
-            all_inputs = [input_name for input_name in self._inputs.keys()]
-            if not all_inputs.__contains__(define._name) and not define.nullable:
-                return False, f"Missing param named '{define._name}' for {self._name}"
-
-        for input_name in self._inputs.keys():
-            if input_name == "kwargs":
-                continue
-            # 参数定义
-            define = self._supported_params().get(input_name)
-            value = self._inputs.get(input_name)
-            #  1.检查参数是否已预定义
-            if define is None:
-                return False, f"Wrong param named '{input_name}' for {self._name}"
-            # 2. 检查是否可以为空
-            if define['nullable'] is False and value is None:
-                return False, f"Value of '{input_name}' can't be {value}"
-            # 3. 对应参数所传入的值是否在区间内
-            valid_range = len(define.val_range) > 0
-            if valid_range and not define.val_range.__contains__(value):
-                return False, f"Value '{value}' of '{input_name}' not in range {define.val_range} for {self._name}"
-        return True, ""
+    def _param_validator(self) -> ParamValidator:
+        """
+        当前算法类的参数校验器, 首次使用时编译
+        """
+        clazz = type(self)
+        validator = AlgorithmBase.__validators.get(clazz)
+        if validator is None:
+            validator = ParamValidator(self._name, self._supported_params(), self._base_params)
+            AlgorithmBase.__validators[clazz] = validator
+        return validator
+
+    @classmethod
+    def _class_params(cls) -> dict[str, AlgorithmParam]:
+        """
+        算法类支持的参数, 无需构造算法对象即可获取时由具体算法重写, 默认为 None
+        """
+        return None
 
-    def __output_format(self, detect_ret: tuple, alarm: tuple) -> (
+    @classmethod
+    def param_check(cls, inputs: dict) -> (bool, str):
+        """
+        构造算法对象前的参数预检查(如服务请求入队前), 算法类未提供 _class_params 时视为通过
+        return:
+            :bool 是否通过
+            :str 校验不通过的异常原因
+        """
+        params = cls._class_params()
+        if params is None:
+            return True, None
+        validator = AlgorithmBase.__validators.get(cls)
+        if validator is None:
+            validator = ParamValidator(cls._name, params, cls._base_params)
+            AlgorithmBase.__validators[cls] = validator
+        return validator.check(inputs)
+
+    def __output_format(self, ctx: AlgorithmContext, detect_ret: tuple, alarm: tuple) -> (
         bool, Any, list[tuple], tuple):
         """
         对输出进行格式化,
@@ -208,7 +343,8 @@ class AlgorithmBase(Base):
         is_alarm, ALEVEL, desc = alarm
 
         # 如果识别失败或 输出类型非‘根据模板',则原样输出
-        if not STATUS or self._instance.output_type != AlgorithmOutputTypeEnum.ByTemplate or self._instance.output_template is None:
+        instance = ctx.instance
+        if not STATUS or instance.output_type != AlgorithmOutputTypeEnum.ByTemplate or not instance.output_template:
             return *detect_ret, *alarm
 
         # if output_type == AlgorithmOutputTypeEnum.QualityOnly:
@@ -221,10 +357,10 @@ class AlgorithmBase(Base):
         #       1. 当前返回值中 检测结果和报警信息 都已具备，没必要再细分
         #       2. 返回值 在后续使用时再根据 output_type 细分处理即可
 
-        format_val = eval(self._instance.output_template)
+        format_val = compile_output_template(instance.output_template).evaluate(STATUS, VALUE, ALEVEL)
         return STATUS, format_val, points, is_alarm, ALEVEL, desc
 
-    def __alarm_trig(self, detect_ret) -> (bool, str, str):
+    def __alarm_trig(self, ctx: AlgorithmContext, detect_ret) -> (bool, str, str):
         """
         根据报警规则触发报警
         return:
@@ -234,16 +370,12 @@ class AlgorithmBase(Base):
         """
         status, val, points = detect_ret
         ret, level, desc = False, None, None
-        rule = self._instance.alarm_rule
+        rule = ctx.instance.alarm_rule
         if isinstance(rule, ExceedLimitAlarmRule):
-            if val >= rule.hh_limit:
-                ret, level, desc = True, "HH", "越高高限报警" if rule.hh_txt is None else rule.hh_txt
-            elif val >= rule.h_limit:
-                ret, level, desc = True, "H", "越高限报警" if rule.h_txt is None else rule.h_txt
-            elif val <= rule.l_limit:
-                ret, level, desc = True, "L", "越低限报警" if rule.l_txt is None else rule.l_txt
-            elif val <= rule.ll_limit:
-                ret, level, desc = True, "LL", "越低低限报警" if rule.ll_txt is None else rule.ll_txt
+            ret, level, desc = exceed_limit_alarm(rule, val)
+        elif isinstance(rule, TrendAlarmRule):
+            tag = ctx.instance.tag
+            ret, level, desc = rule.evaluate(f"{self._name}_{self._id}" if tag is None else tag, val)
         return ret, level, desc
 
     def _get_strategy_by_name(self, name: str):
@@ -255,15 +387,56 @@ class AlgorithmBase(Base):
             raise AlgorithmProcessException(f"Unsupported strategy :{name}")
         return ls[0]
 
-    def _get_input_value_by_name(self, param_name: str):
+    def _get_input_value_by_name(self, param_name: str, ctx: AlgorithmContext = None):
         """
-        根据参数名获取具体 参数值
+        根据参数名获取具体 参数值, 指定 ctx 时取本次调用的输入
         """
-        param_dict = {**self._supported_params(), **self._base_params}
-        lp = [self._inputs.get(pname) for pname in param_dict.keys() if pname == param_name]
-        if len(lp) != 1:
+        if param_name not in self._param_validator().names:
             raise AlgorithmProcessException(f"Unsupported param : {param_name}")
-        return lp[0]
+        return (self._inputs if ctx is None else ctx.inputs).get(param_name)
+
+    def _bind_source(self, src):
+        """
+        替换默认图像源(imgPath), 对象池将空闲对象租给新的调用方时使用, 仅在独占对象时调用
+        """
+        self._inputs = AlgorithmInput({**self._inputs, "imgPath": src})
+
+    def _new_context(self, instance: AlgorithmInstance, inputs: AlgorithmInput, frame=None) -> AlgorithmContext:
+        """
+        创建单次调用的执行上下文, 具体算法可重写以载入本次调用的图像源
+        """
+        return self._context_class(instance, inputs)
+
+    def _result_cache_key(self, cache: ResultCache, instance: AlgorithmInstance, inputs: AlgorithmInput, frame):
+        """
+        本次调用的缓存键, 图像源不可读时为 None(不缓存)
+            每次调用都按图像源当前内容计算摘要(含默认图像源), 文件被覆盖后不会命中旧结果
+        return:
+            key: 缓存键
+            frame: 用于解码的图像源, 文件路径替换为已读出的内容(摘要与识别使用同一份内容)
+        """
+        try:
+            digest, src = source_digest(inputs.get("imgPath") if frame is None else frame)
+        except OSError:
+            return None, frame
+        if digest is None:
+            return None, frame
+        # 默认图像源为数组时仍使用构造时解码的默认帧
+        return cache.key(self, instance, inputs, digest), (frame if src is inputs.get("imgPath") else src)
+
+    def _last_context(self) -> AlgorithmContext:
+        """
+        当前线程最近一次调用的上下文
+        """
+        return getattr(self._local, "context", None)
+
+    @staticmethod
+    def _debug_image(ctx: AlgorithmContext, filename: str, img):
+        """
+        记录中间过程图片, 仅在启用采集且本次调用被采样时生效
+        """
+        if ctx.debug_session is not None:
+            ctx.debug_session.add(filename, img)
 
     def _supported_classify(self):
         return self.classify
@@ -275,14 +448,15 @@ class AlgorithmBase(Base):
         return self.params
 
     @abstractmethod
-    def _preprocess(self) -> Any:
+    def _preprocess(self, ctx: AlgorithmContext) -> Any:
         """
-        图像预处理，比如 灰度、二值化、膨胀、腐蚀 等, 预处理结果内部保存
+        图像预处理，比如 灰度、二值化、膨胀、腐蚀 等, 预处理结果保存在 ctx 中
         """
         pass
 
     @abstractmethod
-    def _do_detect(self, classify: AlgorithmClassifyEnum, strategy: AlgorithmStrategyEnum) -> (bool, Any, tuple):
+    def _do_detect(self, ctx: AlgorithmContext, classify: AlgorithmClassifyEnum,
+                   strategy: AlgorithmStrategyEnum) -> (bool, Any, tuple):
         """
         核心检测算法
         return:
@@ -293,67 +467,168 @@ class AlgorithmBase(Base):
         pass
 
     @abstractmethod
-    def _postprocess(self) -> Any:
+    def _postprocess(self, ctx: AlgorithmContext) -> Any:
         """
         后置处理： 可选, 比如结果展示等
         """
         pass
 
     @abstractmethod
-    def gen_result_img(self) -> None:
+    def gen_result_img(self, ctx: AlgorithmContext = None) -> None:
         """
-        生成绘制结果图像
+        生成绘制结果图像, ctx 为空时使用当前线程最近一次调用的上下文
         """
         pass
 
-    def perform(self, instance: AlgorithmInstance) -> (
+    def perform(self, instance: AlgorithmInstance, frame=None) -> (
         bool, Any, list[tuple], tuple):
         """
-        算法调用主入口
+        算法调用主入口, 可重入: 本次调用的实例、输入及中间结果均保存在独立的上下文中,
+        同一算法对象可被多个线程同时调用
         Usage:
             AlgorithmBase ab = LiquidLevelReco(xxx)
             ret,val,points,*alarm = ab.perform(**)
             ...
+        params:
+            frame: 本次调用的图像源, 为空时使用构造时输入的 imgPath
         return:
             ret: bool 是否识别成功
             val: Any 核心识别结果
             points: list[tuple] 可选项,关键识别结果点的坐标列表
             alarming: tuple 是否报警,报警等级,报警描述
         """
-        # lock.acquire()
-        self._instance = instance
-        # lock.release()
-
-        b, msg = self.__param_check()
+        # 分阶段计时, 未启用指标时为 None
+        timer = metrics.timer(self._name, instance.classify.name)
+        inputs = self._inputs if frame is None else AlgorithmInput({**self._inputs, "imgPath": frame})
+        b, msg = self.__param_check(inputs)
         if not b:
+            if timer is not None:
+                timer.count("perform", result="failure")
             raise AlgorithmCheckException(f"Param check exception: {msg}")
+        if timer is not None:
+            timer.lap("param_check")
+        cache, key = self.result_cache, None
+        # 有状态的报警规则每个读数都需更新状态, 不使用缓存
+        if cache is not None and not getattr(instance.alarm_rule, "stateful", False):
+            key, frame = self._result_cache_key(cache, instance, inputs, frame)
+            ret = None if key is None else cache.get(key)
+            if ret is not None:
+                # 命中时不执行识别, 本线程没有可用于绘制结果图的上下文
+                self._local.context = None
+                if timer is not None:
+                    timer.count("cache", result="hit")
+                return ret
+        ctx = self._new_context(instance, inputs, frame)
+        self._local.context = ctx
+        if self.debug_capture is not None:
+            ctx.debug_session = self.debug_capture.begin(f"{self._name}_{self._id}")
+        if timer is not None:
+            # 含缓存键的图像摘要与上下文中的图像解码
+            timer.lap("decode")
         # 默认失败, 无值, 无坐标点
         detect_ret = False, None, ()
         alarm = False, None, None
+        stage = "preprocess"
         try:
-            logging.debug(f"{self.cn_name}_{self._id} start to preprocessing image... ")
-            self._preprocess()
-
-            logging.debug(f"{self.cn_name}_{self._id} start to do_detect... ")
-            detect_ret = self._do_detect(self._instance.classify, self._instance.strategy)
+            logging.debug("%s_%s start to preprocessing image... ", self.cn_name, self._id)
+            self._preprocess(ctx)
+            if timer is not None:
+                timer.lap(stage)
+
+            stage = "detect"
+            logging.debug("%s_%s start to do_detect... ", self.cn_name, self._id)
+            detect_ret = self._do_detect(ctx, instance.classify, instance.strategy)
+            if timer is not None:
+                timer.lap(stage)
         except AlgorithmProcessException as e:
-            logging.error(f"pre AlgorithmProcessException {e}")
+            logging.error("pre AlgorithmProcessException %s", e)
+            if timer is not None:
+                timer.lap(stage)
 
         detect_success = detect_ret[0]
         # 是否需要检测报警
-        is_trig_alarm = self._instance.output_type == AlgorithmOutputTypeEnum.AlarmLevel or self._instance.output_type == AlgorithmOutputTypeEnum.ByTemplate
-        if detect_success and is_trig_alarm and self._instance.alarm_rule is not None:
-            logging.debug(f"{self.cn_name}_{self._id} start to trig alarm ... ")
-            alarm = self.__alarm_trig(detect_ret)
+        is_trig_alarm = instance.output_type == AlgorithmOutputTypeEnum.AlarmLevel or instance.output_type == AlgorithmOutputTypeEnum.ByTemplate
+        if detect_success and is_trig_alarm and instance.alarm_rule is not None:
+            logging.debug("%s_%s start to trig alarm ... ", self.cn_name, self._id)
+            alarm = self.__alarm_trig(ctx, detect_ret)
+            if timer is not None:
+                timer.lap("alarm")
 
         try:
-            logging.debug(f"{self.cn_name}_{self._id} start to postprocess ...")
-            self._postprocess()
+            logging.debug("%s_%s start to postprocess ...", self.cn_name, self._id)
+            self._postprocess(ctx)
         except AlgorithmProcessException as e:
-            logging.error(f"post AlgorithmProcessException {e}")
+            logging.error("post AlgorithmProcessException %s", e)
+
+        if ctx.debug_session is not None:
+            self.debug_capture.commit(ctx.debug_session, detect_success)
+        if timer is not None:
+            timer.lap("postprocess")
+
+        logging.info("%s_%s perform success ", self.cn_name, self._id)
+        ret = self.__output_format(ctx, detect_ret, alarm)
+        if timer is not None:
+            timer.lap("output_format")
+            timer.count("perform", result="success" if detect_success else "failure")
+            if alarm[0]:
+                timer.count("alarm", level=alarm[1])
+        if key is not None:
+            cache.put(key, ret)
+        return ret
+
+    @classmethod
+    def perform_batch(cls, inputs: list[AlgorithmInput], instance: AlgorithmInstance, workers: int = None,
+                      cv_threads: int = 1, chunksize: int = 1) -> list[AlgorithmOutput]:
+        """
+        批量调用入口, 将多组输入分发到进程池中执行, 需在具体算法类上调用
+        Usage:
+            outputs = LiquidLevelRecoPrimary.perform_batch(inputs, instance, workers=4)
+        params:
+            workers: 进程数, 默认 cpu 核数; 为 1 时在当前进程内顺序执行, 有状态的报警规则仅支持该方式
+            cv_threads: 每个 worker 中 OpenCV 自身的线程数, 防止进程池与 OpenCV 线程争抢 CPU
+        return:
+            与 inputs 顺序一致的 AlgorithmOutput 列表, 单条参数/处理异常记录在 AlgorithmOutput.error 中, 不中断整批
+        """
+        from concurrent.futures import ProcessPoolExecutor
+
+        ids = range(len(inputs))
+        if workers == 1:
+            return list(map(_batch_perform_one, repeat(cls), ids, inputs, repeat(instance)))
+        _reject_stateful_rule(instance)
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_batch_worker_init,
+                                 initargs=(cv_threads,)) as pool:
+            return list(pool.map(_batch_perform_one, repeat(cls), ids, inputs, repeat(instance),
+                                 chunksize=chunksize))
+
+    async def perform_async(self, instance: AlgorithmInstance, frame=None, executor=None,
+                            timeout: float = None) -> AlgorithmOutput:
+        """
+        asyncio 调用入口, 识别过程在执行器中运行, 不阻塞事件循环
+        Usage:
+            output = await algorithm.perform_async(instance, frame, timeout=1.0)
+        params:
+            executor: AsyncAlgorithmExecutor, 默认使用进程内共享的线程池执行器
+            timeout: 超时时间(秒), 超时抛出 asyncio.TimeoutError
+        """
+        from iapp_v0.algorithm.base.async_executor import default_executor
+
+        executor = default_executor() if executor is None else executor
+        return await executor.perform(self, instance, frame, timeout)
+
+    @classmethod
+    async def perform_batch_async(cls, inputs: list[AlgorithmInput], instance: AlgorithmInstance, executor=None,
+                                  timeout: float = None) -> list[AlgorithmOutput]:
+        """
+        asyncio 批量调用入口, 需在具体算法类上调用, 语义同 perform_batch
+        params:
+            executor: AsyncAlgorithmExecutor, 默认使用进程内共享的线程池执行器
+            timeout: 每条任务的超时时间(秒)
+        """
+        from iapp_v0.algorithm.base.async_executor import default_executor
 
-        logging.info(f"{self.cn_name}_{self._id} perform success ")
-        return self.__output_format(detect_ret, alarm)
+        executor = default_executor() if executor is None else executor
+        return await executor.perform_batch(cls, inputs, instance, timeout)
 
     @staticmethod
     def json_schema_2_algorithm_params(file_abspath: AnyStr):
@@ -380,3 +655,32 @@ class AlgorithmBase(Base):
             return AlgorithmParam(key, description, cn_name, val_type, val_range, nullable, _id)
 
         return {key: __c2param(key) for key in schema['inputParam'].keys()}
+
+
+def _reject_stateful_rule(instance: AlgorithmInstance):
+    """
+    有状态的报警规则在 worker 进程中更新的是序列化后的副本, 状态无法回传, 进程池执行时拒绝
+    """
+    if getattr(instance.alarm_rule, "stateful", False):
+        raise AlgorithmCheckException(
+            f"Stateful alarm rule {type(instance.alarm_rule).__name__} is not supported in process pools")
+
+
+def _batch_worker_init(cv_threads: int):
+    """
+    批量执行 worker 进程初始化
+    """
+    import cv2
+    cv2.setNumThreads(cv_threads)
+
+
+def _batch_perform_one(clazz: type, _id: int, _inputs: AlgorithmInput, instance: AlgorithmInstance) -> AlgorithmOutput:
+    """
+    批量执行中的单条任务, 需为模块级函数以便进程池序列化
+    """
+    try:
+        algorithm = clazz(_inputs, _id)
+        return AlgorithmOutput(*algorithm.perform(instance))
+    except (AlgorithmCheckException, AlgorithmProcessException) as e:
+        logging.error("batch item %s failed: %s", _id, e.message)
+        return AlgorithmOutput(False, None, (), False, None, None, error=e)
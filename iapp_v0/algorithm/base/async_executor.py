@@ -0,0 +1,113 @@
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from iapp_v0.algorithm.base.algorithm_base import AlgorithmBase, AlgorithmInput, AlgorithmInstance, \
+    AlgorithmOutput, _batch_worker_init, _batch_perform_one, _reject_stateful_rule
+
+# 执行器类型
+THREAD = "thread"
+PROCESS = "process"
+
+
+class AsyncAlgorithmExecutor(object):
+    """
+    asyncio 调用适配, CPU 密集的识别过程在线程池/进程池中执行, 事件循环只负责调度
+    Usage:
+        async with AsyncAlgorithmExecutor(workers=4, max_concurrency=16) as executor:
+            output = await executor.perform(algorithm, instance, frame, timeout=1.0)
+    :kind "thread" 线程池(OpenCV 运算期间释放 GIL) 或 "process" 进程池
+    :workers worker 数, 默认由执行器决定
+    :max_concurrency 同时提交到执行器的最大调用数(含排队), 超出时在事件循环中等待, 默认不限
+    :cv_threads 进程池中每个 worker 的 OpenCV 线程数
+    """
+
+    def __init__(self, kind: str = THREAD, workers: int = None, max_concurrency: int = None, cv_threads: int = 1):
+        if kind == THREAD:
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="AsyncAlgorithmExecutor")
+        elif kind == PROCESS:
+            self._executor = ProcessPoolExecutor(max_workers=workers, initializer=_batch_worker_init,
+                                                 initargs=(cv_threads,))
+        else:
+            raise ValueError(f"Unsupported executor kind: {kind}")
+        self.kind = kind
+        self._semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+
+    async def perform(self, algorithm: AlgorithmBase, instance: AlgorithmInstance, frame=None,
+                      timeout: float = None) -> AlgorithmOutput:
+        """
+        异步执行单次识别, 超时抛出 asyncio.TimeoutError
+        进程池模式下算法对象需可序列化: 不可启用 debug_capture; result_cache、change_detector 不传入 worker,
+        即进程池中的调用不读写结果缓存、不做变化检测
+        params:
+            frame: 本次调用的图像源, 为空时使用构造时输入的 imgPath
+            timeout: 超时时间(秒), 含排队时间
+        """
+        if self.kind == PROCESS:
+            _reject_stateful_rule(instance)
+        return await self._submit(timeout, _async_perform_one, algorithm, instance, frame)
+
+    async def perform_batch(self, clazz: type, inputs: list[AlgorithmInput], instance: AlgorithmInstance,
+                            timeout: float = None) -> list[AlgorithmOutput]:
+        """
+        异步批量识别, 语义同 AlgorithmBase.perform_batch, 单条超时同样记录在 AlgorithmOutput.error 中
+        params:
+            timeout: 每条任务的超时时间(秒)
+        """
+        if self.kind == PROCESS:
+            _reject_stateful_rule(instance)
+        return list(await asyncio.gather(*(self._perform_one(timeout, clazz, _id, _inputs, instance)
+                                           for _id, _inputs in enumerate(inputs))))
+
+    async def _perform_one(self, timeout, clazz, _id, _inputs, instance) -> AlgorithmOutput:
+        try:
+            return await self._submit(timeout, _batch_perform_one, clazz, _id, _inputs, instance)
+        except asyncio.TimeoutError as e:
+            logging.error("batch item %s timed out after %ss", _id, timeout)
+            return AlgorithmOutput(False, None, (), False, None, None, error=e)
+
+    async def _submit(self, timeout, fn, *args):
+        """
+        提交到执行器; 被取消或超时时, 尚未开始执行的任务从执行器队列中撤销, 已开始的任务执行完后丢弃结果
+        """
+        return await asyncio.wait_for(self._run(fn, *args), timeout)
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None:
+            return await loop.run_in_executor(self._executor, functools.partial(fn, *args))
+        async with self._semaphore:
+            return await loop.run_in_executor(self._executor, functools.partial(fn, *args))
+
+    def close(self, wait: bool = True):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+
+_default_executor = None
+_default_lock = threading.Lock()
+
+
+def default_executor() -> AsyncAlgorithmExecutor:
+    """
+    perform_async 默认使用的线程池执行器, 首次使用时创建
+    """
+    global _default_executor
+    with _default_lock:
+        if _default_executor is None:
+            _default_executor = AsyncAlgorithmExecutor(THREAD)
+        return _default_executor
+
+
+def _async_perform_one(algorithm: AlgorithmBase, instance: AlgorithmInstance, frame) -> AlgorithmOutput:
+    """
+    单次识别任务, 需为模块级函数以便进程池序列化
+    """
+    return AlgorithmOutput(*algorithm.perform(instance, frame))
@@ -0,0 +1,71 @@
+import functools
+from types import CodeType
+from typing import Any, Union
+
+from iapp_v0.exceptions.custom_exception import AlgorithmCheckException
+
+# 模板内置变量  质量位： STATUS   数值：  VALUE   报警等级： ALEVEL
+TEMPLATE_NAMES = frozenset(("STATUS", "VALUE", "ALEVEL"))
+
+
+def _referenced_names(code: CodeType) -> set:
+    """
+    模板(含嵌套的推导式/lambda)中引用的全部名称
+    """
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            names |= _referenced_names(const)
+    return names
+
+
+class OutputTemplate(object):
+    """
+    预编译的输出模板, 仅能访问 STATUS/VALUE/ALEVEL 三个内置变量
+    """
+
+    def __init__(self, code: CodeType, source: Union[str, bytes] = None):
+        unsupported = _referenced_names(code) - TEMPLATE_NAMES
+        if unsupported:
+            raise AlgorithmCheckException(f"Unsupported names {sorted(unsupported)} in output template, "
+                                          f"only {sorted(TEMPLATE_NAMES)} are available")
+        self.code = code
+        self.source = source
+
+    def evaluate(self, status: bool, value: Any, alevel: str) -> Any:
+        return eval(self.code, {"__builtins__": {}, "STATUS": status, "VALUE": value, "ALEVEL": alevel})
+
+    def evaluate_many(self, status, values, alevels=None):
+        """
+        向量化形式, 将同一模板作用于一组读数
+            STATUS/VALUE/ALEVEL 以 numpy 数组形式整体代入, 模板不支持数组运算(如条件表达式)时逐条计算
+        return:
+            与 values 等长的数组, 识别失败(STATUS 为 False)的读数保持原值
+        """
+        import numpy as np
+
+        status = np.asarray(status, dtype=bool)
+        values = np.asarray(values)
+        alevels = np.full(values.shape, None, dtype=object) if alevels is None else np.asarray(alevels, dtype=object)
+        try:
+            with np.errstate(all="ignore"):
+                formatted = np.broadcast_to(self.evaluate(status, values, alevels), values.shape)
+        except (TypeError, ValueError):
+            formatted = np.empty(values.shape, dtype=object)
+            for i in np.flatnonzero(status):
+                formatted[i] = self.evaluate(True, values[i], alevels[i])
+        return np.where(status, formatted, values)
+
+
+@functools.lru_cache(maxsize=256)
+def compile_output_template(template: Union[str, bytes, CodeType]) -> OutputTemplate:
+    """
+    编译输出模板, 以模板文本为键缓存编译结果
+    """
+    if isinstance(template, CodeType):
+        return OutputTemplate(template)
+    try:
+        code = compile(template, "<output_template>", "eval")
+    except SyntaxError as e:
+        raise AlgorithmCheckException(f"Output template compile error: {e}")
+    return OutputTemplate(code, template)
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from enum import Enum
+from typing import Any
+
+# 摘要长度(字节)
+DIGEST_SIZE = 16
+
+
+def source_digest(src) -> (bytes, Any):
+    """
+    图像源内容摘要, 只读取不解码
+    return:
+        digest: 摘要, 图像源为空时为 None
+        frame: 可替代原图像源用于解码的对象(文件路径替换为已读出的 bytes, 避免重复读盘)
+    """
+    if src is None:
+        return None, None
+    h = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    if isinstance(src, (bytes, bytearray, memoryview)):
+        h.update(b"b")
+        h.update(src)
+        return h.digest(), src
+    if hasattr(src, "shape") and hasattr(src, "dtype"):
+        # numpy 数组, 形状与类型参与摘要
+        h.update(f"a{src.shape}{src.dtype}".encode())
+        h.update(src.data if src.flags.c_contiguous else src.tobytes())
+        return h.digest(), src
+    with open(os.fspath(src), "rb") as f:
+        data = f.read()
+    h.update(b"b")
+    h.update(data)
+    return h.digest(), data
+
+
+def _normalize(value):
+    """
+    转换为稳定的 JSON 可序列化形式
+    """
+    if isinstance(value, Enum):
+        return value.name
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if hasattr(value, "__dict__"):
+        return [type(value).__qualname__, _normalize(vars(value))]
+    return repr(value)
+
+
+class ResultCache(object):
+    """
+    识别结果缓存, 以 (算法类, 图像内容摘要, 除图像源外的算法输入, 算法实例) 为键,
+    相同图像(字节一致)相同参数的重复请求直接返回缓存结果, 无需解码与识别
+    Usage:
+        algorithm.result_cache = ResultCache(max_entries=1024, ttl=60)
+    :max_entries 最多缓存的结果数, 超出后淘汰最久未使用的结果
+    :ttl 结果有效期(秒), 为空时不过期
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = None):
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be >= 1, got {max_entries}")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        # 键 -> (过期时间, 结果)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(algorithm, instance, inputs: dict, digest: bytes) -> bytes:
+        """
+        缓存键, 图像内容以摘要参与计算
+        """
+        params = {k: v for k, v in inputs.items() if k != "imgPath"}
+        h = hashlib.blake2b(digest, digest_size=DIGEST_SIZE)
+        h.update(f"{type(algorithm).__module__}.{type(algorithm).__qualname__}".encode())
+        h.update(json.dumps([_normalize(params), _normalize(vars(instance))], sort_keys=True).encode())
+        return h.digest()
+
+    def get(self, key: bytes):
+        """
+        读取缓存结果, 未命中或已过期时返回 None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: bytes, value):
+        expires = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses,
+                    "hit_rate": self.hits / total if total else 0.0,
+                    "evictions": self.evictions, "expirations": self.expirations}
+
+    def __len__(self):
+        return len(self._entries)
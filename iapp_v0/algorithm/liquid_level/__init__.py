@@ -1,8 +1,38 @@
 # 液位识别
-from .ab_liquid_level_reco import LiquidLevelReco
+import importlib
+
+from iapp_v0.algorithm.registry import registry
+from iapp_v0.constant.constant import AlgorithmClassifyEnum, AlgorithmStrategyEnum
 
 __version__ = "1.0.0"
 
 __all__ = [
-    "LiquidLevelReco"
+    "LiquidLevelReco",
+    "GaugeConfig",
+    "MultiGaugeReader"
 ]
+
+# 导出对象 -> 所在模块, 首次访问时才导入(依赖 cv2/numpy), 保证本包可被廉价导入
+_lazy_exports = {
+    "LiquidLevelReco": ".ab_liquid_level_reco",
+    "GaugeConfig": ".gauge_config",
+    "MultiGaugeReader": ".multi_gauge",
+}
+
+
+def __getattr__(name):
+    module = _lazy_exports.get(name)
+    if module is None:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+# 注册液位识别算法, 算法模块在首次使用时导入
+registry.register("LiquidLevelReco", AlgorithmClassifyEnum.Primary, AlgorithmStrategyEnum.Main,
+                  "iapp_v0.algorithm.liquid_level.ab_liquid_level_reco_primary:LiquidLevelRecoPrimary",
+                  code="CODE_10093")
+registry.register("LiquidLevelReco", AlgorithmClassifyEnum.Secondary, AlgorithmStrategyEnum.Main,
+                  "iapp_v0.algorithm.liquid_level.ab_liquid_level_reco_secondary:LiquidLevelRecoSecondary",
+                  code="CODE_10093")
@@ -1,17 +1,25 @@
+import functools
+import hashlib
+import itertools
 import logging
 import os
 from abc import abstractmethod
-from typing import Any
+from typing import Any, Iterator
 
 import cv2
+import numpy as np
 
-from iapp_v0.algorithm.base.algorithm_base import AlgorithmInput, AlgorithmBase, AlgorithmParam, AlgorithmStrategy
-from iapp_v0.constant.constant import *
+from iapp_v0.algorithm.base.algorithm_base import AlgorithmInput, AlgorithmBase, AlgorithmParam, AlgorithmStrategy, \
+    AlgorithmInstance, AlgorithmOutput, AlgorithmContext
+from iapp_v0.algorithm.liquid_level.gauge_config import GaugeConfig
+from iapp_v0.constant.constant import AlgorithmClassifyEnum, AlgorithmStrategyEnum, ColorSeriesEnum
 from iapp_v0.exceptions.custom_exception import AlgorithmProcessException
-from iapp_v0.utils.utils import RectUtils
+from iapp_v0.utils.color_label import color_labeler
+from iapp_v0.utils.frame_cache import frame_cache
+from iapp_v0.utils.metrics import metrics
+from iapp_v0.utils.morphology import vertical_morphology
+from iapp_v0.utils.utils import RectUtils, VideoUtils
 
-# 是否输出中间过程图片
-WRITE_PROCESS_IMAGE = True
 # 是否show中间过程图片
 SHOW_PROCESS_IMAGE = False
 # 透视变化阈值角度
@@ -19,6 +27,49 @@ SHOW_PROCESS_IMAGE = False
 # THRESHOLD = math.tan(theta * math.pi / 180)
 # 最小量程精度百分比
 MIN_PRECISION_PERCENT = 0.1
+# 粗到精定位时精修窄带的最大移动次数
+MAX_BAND_MOVES = 8
+# 解码方式: (是否需要颜色, 降采样倍数) -> imread flags
+DECODE_FLAGS = {
+    (True, 1): cv2.IMREAD_COLOR, (True, 2): cv2.IMREAD_REDUCED_COLOR_2,
+    (True, 4): cv2.IMREAD_REDUCED_COLOR_4, (True, 8): cv2.IMREAD_REDUCED_COLOR_8,
+    (False, 1): cv2.IMREAD_GRAYSCALE, (False, 2): cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    (False, 4): cv2.IMREAD_REDUCED_GRAYSCALE_4, (False, 8): cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+
+
+class _ReducedFrame(object):
+    """
+    已按 scale 倍降采样解码的图像, read 中变化检测与识别共用同一次解码
+    """
+    __slots__ = ("img", "scale")
+
+    def __init__(self, img: np.ndarray, scale: int):
+        self.img = img
+        self.scale = scale
+
+
+class LiquidLevelContext(AlgorithmContext):
+    """
+    液位识别单次调用的上下文, 保存图像源及各阶段中间结果
+    """
+
+    def __init__(self, instance: AlgorithmInstance, inputs: AlgorithmInput):
+        super(LiquidLevelContext, self).__init__(instance, inputs)
+        self.origin_img = None
+        self.cut_target = None
+        self.binary_target = None
+        self.final_area = None
+        self.final_liquid = None
+        self.final_num = None
+        # ROI 左上角在原图中的坐标
+        self.roi_offset = None
+        # 本次处理使用的液位计配置(降采样解码/粗定位时为缩小后的配置)
+        self.gauge = None
+        # 图像源的降采样解码倍数
+        self.decode_scale = 1
+        # 读数精度(量程单位), 即液面定位误差对应的读数
+        self.precision = None
 
 
 class LiquidLevelReco(AlgorithmBase):
@@ -26,6 +77,11 @@ class LiquidLevelReco(AlgorithmBase):
     液位识别
     """
     schema_path = os.path.join(os.path.dirname(__file__), "schema_.json")
+    _context_class = LiquidLevelContext
+    # 二值化结果在缩小图像上是否仍可定位液柱, 否则忽略 coarse_to_fine
+    _coarse_locatable = False
+    # 识别是否需要颜色, 否则图像源解码为灰度图
+    _needs_color = True
 
     _name = "LiquidLevelReco.Base.v1"
     _description = "识别算法.基础.版本v1"
@@ -41,34 +97,166 @@ class LiquidLevelReco(AlgorithmBase):
                           "基于轮廓的液位识别主策略", kv_param={})
     ]
 
-    # 支持的算法参数，若干
-    __supported_params = AlgorithmBase.json_schema_2_algorithm_params(schema_path)
-
-    def __init__(self, _inputs: AlgorithmInput, _id: int = -1):
+    def __init__(self, _inputs: AlgorithmInput, _id: int = -1, gauge: GaugeConfig = None):
+        """
+        :_inputs 算法输入, 逐帧调用 read 时可不含 imgPath
+        :gauge 已配置的液位计, 为空时根据 _inputs 构造, 缺少液位计参数时抛出 AlgorithmCheckException
+        """
         super(LiquidLevelReco, self).__init__(self.__class__._name, self.__class__._description,
                                               self.__class__._cn_name, self.__class__.__supported_classify,
-                                              self.__class__.__supported_strategies, self.__class__.__supported_params)
+                                              self.__class__.__supported_strategies, self._schema_params())
         self._inputs = _inputs
-        # 算法实例参数
-        self._instance = None
-        self._processFinalArea = None
-        self._processFinalNum = None
-
-        self._originImg = cv2.imread(self._get_input_value_by_name("imgPath"))
-        self._thresholdUpper = self._get_input_value_by_name("thresholdUpper")
-        self._thresholdLower = self._get_input_value_by_name("thresholdLower")
-        self._rangeUp = self._get_input_value_by_name("rangeUp")
-        self._rangeDown = self._get_input_value_by_name("rangeDown")
-
-        self._columnLeftTop = self._get_input_value_by_name("column")[0]
-        self._columnLeftBottom = self._get_input_value_by_name("column")[1]
-        self._columnRightBottom = self._get_input_value_by_name("column")[2]
-        self._columnRightTop = self._get_input_value_by_name("column")[3]
-
-        self._processOutputDir = os.getcwd()  # TODO
-
-    def _temp_show_contour(self, contour, area=None):
-        temp = self._processCutTarget.copy()
+        # 液位计配置(几何/量程), 可跨帧复用
+        self._gauge = gauge if gauge is not None else GaugeConfig.from_inputs(_inputs)
+        # 画面变化检测(可选), 仅作用于逐帧识别入口 read/stream, 参考 ChangeDetector
+        self.change_detector = None
+        # 粗到精定位(可选), 参考 CoarseToFine
+        self.coarse_to_fine = None
+
+        # 图像源: 文件路径 / BGR 数组 / 编码后的 bytes, 作为未指定 frame 时的默认帧
+        # 文件路径在每次调用时经 frame_cache 解码, 其余图像源在构造时解码一次
+        self._originImg = self.__default_frame(self._get_input_value_by_name("imgPath"))
+
+    def __getstate__(self):
+        # 变化检测仅作用于 read/stream 且含锁, 不随对象传入进程池
+        state = super(LiquidLevelReco, self).__getstate__()
+        state["change_detector"] = None
+        return state
+
+    def __default_frame(self, src):
+        return src if isinstance(src, (str, os.PathLike)) else self._decode(src, reduce=False)[0]
+
+    def _bind_source(self, src):
+        super(LiquidLevelReco, self)._bind_source(src)
+        self._originImg = self.__default_frame(src)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _schema_params() -> dict[str, AlgorithmParam]:
+        """
+        支持的算法参数，若干, 首次使用时解析 schema
+        """
+        return AlgorithmBase.json_schema_2_algorithm_params(LiquidLevelReco.schema_path)
+
+    @classmethod
+    def _class_params(cls) -> dict[str, AlgorithmParam]:
+        return cls._schema_params()
+
+    @classmethod
+    def param_check(cls, inputs: dict) -> (bool, str):
+        """
+        构造前的参数预检查, 另校验颜色系列可被解析
+        """
+        ok, msg = super(LiquidLevelReco, cls).param_check(inputs)
+        if ok and inputs.get("colorSeries") is not None:
+            try:
+                ColorSeriesEnum.from_str(str(inputs["colorSeries"]))
+            except ValueError as e:
+                return False, str(e)
+        return ok, msg
+
+    def _new_context(self, instance: AlgorithmInstance, inputs: AlgorithmInput, frame=None) -> LiquidLevelContext:
+        """
+        创建本次调用的上下文并载入图像源
+        """
+        ctx = super(LiquidLevelReco, self)._new_context(instance, inputs, frame)
+        ctx.origin_img, ctx.decode_scale = self._decode(self._originImg if frame is None else frame)
+        # 降采样解码时整个流程在缩小后的坐标系中进行
+        ctx.gauge = self._gauge if ctx.decode_scale == 1 else self._gauge.scaled((0, 0), ctx.decode_scale)
+        return ctx
+
+    def _decode(self, src, reduce: bool = True):
+        """
+        解码图像源
+            1. 不需要颜色的分类(质量模型)解码为灰度图
+            2. 启用 coarse_to_fine 时按其允许的倍数降采样解码(IMREAD_REDUCED_*), 已解码的数组不缩小
+            3. 文件路径经进程内 frame_cache 缓存
+        return:
+            img: 解码后的图像, 读取失败时为 None
+            scale: 降采样倍数
+        """
+        if isinstance(src, _ReducedFrame):
+            return src.img, src.scale
+        scale, c2f = 1, self.coarse_to_fine
+        if reduce and c2f is not None and self._coarse_locatable and not isinstance(src, np.ndarray):
+            scale = c2f.decode_scale(self._gauge)
+        return frame_cache.decode(src, DECODE_FLAGS[self._needs_color, scale]), scale
+
+    def _result_cache_key(self, cache, instance: AlgorithmInstance, inputs: AlgorithmInput, frame):
+        """
+        启用粗到精定位时读数可能不同, 其配置参与缓存键; 已降采样解码的图像以 (图像, 倍数) 参与缓存键
+        """
+        if isinstance(frame, _ReducedFrame):
+            key, _ = super(LiquidLevelReco, self)._result_cache_key(cache, instance, inputs, frame.img)
+            if key is not None:
+                key = hashlib.blake2b(f"reduced{frame.scale}".encode(), key=key, digest_size=len(key)).digest()
+        else:
+            key, frame = super(LiquidLevelReco, self)._result_cache_key(cache, instance, inputs, frame)
+        if key is not None and self.coarse_to_fine is not None:
+            key = hashlib.blake2b(repr(self.coarse_to_fine).encode(), key=key, digest_size=len(key)).digest()
+        return key, frame
+
+    def _perform_output(self, instance: AlgorithmInstance, frame) -> AlgorithmOutput:
+        """
+        perform 结果附带本次识别的读数精度
+        """
+        output = AlgorithmOutput(*self.perform(instance, frame))
+        ctx = self._last_context()
+        if ctx is not None and output.ret:
+            output.precision = ctx.precision
+        return output
+
+    def read(self, frame, instance: AlgorithmInstance) -> AlgorithmOutput:
+        """
+        逐帧识别入口, 复用已配置的液位计, 仅替换图像源
+        Usage:
+            reco = LiquidLevelRecoPrimary(AlgorithmInput({...}))
+            for frame in frames:
+                output = reco.read(frame, instance)
+        params:
+            frame: 图像文件路径 / BGR 数组 / 编码后的 bytes
+        return:
+            启用 change_detector 且画面无明显变化时, 返回沿用上次结果的 AlgorithmOutput(carried_forward=True)
+            识别成功时 precision 为读数精度(命中结果缓存时为空)
+        """
+        detector = self.change_detector
+        if detector is None:
+            return self._perform_output(instance, frame)
+
+        # 按识别所需的方式(灰度/降采样)只解码一次, 变化检测与识别共用
+        img, scale = self._decode(frame)
+        thumbnail = detector.thumbnail(img, self._gauge if scale == 1 else self._gauge.scaled((0, 0), scale))
+        output = detector.carry(thumbnail, instance)
+        if output is not None:
+            if metrics.enabled:
+                metrics.inc("carried_forward", algorithm=self._name, classify=instance.classify.name)
+            return output
+        if img is not None:
+            frame = img if scale == 1 else _ReducedFrame(img, scale)
+        output = self._perform_output(instance, frame)
+        detector.update(thumbnail, instance, output)
+        return output
+
+    def stream(self, source, instance: AlgorithmInstance, every_n: int = 1) -> Iterator[AlgorithmOutput]:
+        """
+        视频流识别入口, 惰性地逐帧输出识别结果, 液位计配置跨帧复用, 内存占用与流长度无关
+        Usage:
+            for output in reco.stream("rtsp://...", instance, every_n=5):
+                ...
+        params:
+            source: 帧迭代器, 或 cv2.VideoCapture 可打开的视频文件路径 / 设备号
+            every_n: 每 N 帧识别 1 帧
+        """
+        if isinstance(source, (str, int, os.PathLike)):
+            frames = VideoUtils.frames(source, every_n)
+        else:
+            frames = itertools.islice(source, 0, None, every_n)
+        for frame in frames:
+            yield self.read(frame, instance)
+
+    @staticmethod
+    def _temp_show_contour(ctx: LiquidLevelContext, contour, area=None):
+        temp = ctx.cut_target.copy()
         if area is not None:
             print("__area,", area)
 
@@ -76,145 +264,220 @@ class LiquidLevelReco(AlgorithmBase):
         cv2.imshow("__process_img", temp)
         cv2.waitKey()
 
-    def _img_cut(self):
+    def _img_cut(self, ctx: LiquidLevelContext):
         """
-        图像预处理,根据给定坐标直接切图
+        图像预处理, 先按液柱外接矩形(含边距)截取 ROI, 再在 ROI 内根据给定坐标切图
+        后续二值化、轮廓等处理均只在 ROI 上进行, 结果坐标通过 roi_offset 映射回原图
         """
-        img = cv2.GaussianBlur(self._originImg, (3, 3), 0)
-
-        box = [self._columnLeftTop, self._columnLeftBottom, self._columnRightBottom, self._columnRightTop]
-        if WRITE_PROCESS_IMAGE:
-            cv2.imwrite(self._processOutputDir + "/11_origin.jpg", self._originImg)
-
-        # self.mask = np.zeros(img.shape, dtype=np.uint8)
-        # roi_corners = np.array([points], dtype=np.int32)
-        # # # 创建mask层
-        # cv2.fillPoly(self.mask, roi_corners, (255, 255, 255))
-        # # # 为每个像素进行or操作，除mask区域外，全为0
-        # self._processCutTarget = cv2.bitwise_and(img, self.mask)
-        # 白
-        mask = np.ones(img.shape, dtype="uint8") * 255
-        roi_corners = np.array([box], dtype=np.int32)
-        # 黑
-        cv2.fillPoly(mask, roi_corners, (0, 0, 0))
-        self._processCutTarget = cv2.bitwise_or(self._originImg, mask)
+        offset, mask = ctx.gauge.cut_mask(ctx.origin_img.shape)
+        x0, y0 = offset
+        roi = ctx.origin_img[y0:y0 + mask.shape[0], x0:x0 + mask.shape[1]]
+        ctx.roi_offset = offset
 
-        if WRITE_PROCESS_IMAGE:
-            cv2.imwrite(self._processOutputDir + "/11_origin.jpg", self._originImg)
-            cv2.imwrite(self._processOutputDir + "/12_matchRet.jpg", self._processCutTarget)
+        self._debug_image(ctx, "11_origin.jpg", ctx.origin_img)
+        ctx.cut_target = cv2.bitwise_or(roi, mask)
+        self._debug_image(ctx, "12_matchRet.jpg", ctx.cut_target)
 
-    def _img_threshold(self):
+    def _img_threshold(self, ctx: LiquidLevelContext):
         """
         图像二值化
         :return:
         """
-        gray = cv2.cvtColor(self._processCutTarget, cv2.COLOR_BGR2GRAY)
+        gray = ctx.cut_target if ctx.cut_target.ndim == 2 else cv2.cvtColor(ctx.cut_target, cv2.COLOR_BGR2GRAY)
         # gray = cv2.bitwise_not(gray)
-        H = int((self._columnRightBottom[1] - self._columnRightTop[1]) * 0.01) + 1
+        H = ctx.gauge.kernel_height + 1
         H1 = H * 2 + 1
-        kernel = np.ones((H, 1), np.uint8)
-        dilate = cv2.dilate(gray, kernel, iterations=5)
-        erode = cv2.erode(dilate, kernel, iterations=3)
-        if WRITE_PROCESS_IMAGE:
-            cv2.imwrite(self._processOutputDir + "/21_gray.jpg", erode)
+        # 膨胀 5 次 + 腐蚀 3 次
+        erode = vertical_morphology(H, (cv2.MORPH_DILATE, 5), (cv2.MORPH_ERODE, 3)).apply(gray)
+        self._debug_image(ctx, "21_gray.jpg", erode)
         thre = cv2.adaptiveThreshold(erode, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, H1, 2)
         # reval_T, thre = cv2.threshold(erode, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
 
-        kernel = np.ones((H, 1), np.uint8)
-        dilate2 = cv2.dilate(thre, kernel, iterations=3)
-        self._processBinaryTarget = cv2.erode(dilate2, kernel, iterations=1)
-        if WRITE_PROCESS_IMAGE:
-            cv2.imwrite(self._processOutputDir + "/22_binary.jpg", self._processBinaryTarget)
+        # 膨胀 3 次 + 腐蚀 1 次
+        ctx.binary_target = vertical_morphology(H, (cv2.MORPH_DILATE, 3), (cv2.MORPH_ERODE, 1)).apply(thre)
+        self._debug_image(ctx, "22_binary.jpg", ctx.binary_target)
 
-    def _img_threshold_by_color(self, color=ColorSeriesEnum.Red):
+    def _img_threshold_by_color(self, ctx: LiquidLevelContext, color=ColorSeriesEnum.Red):
         """
         图像二值化
         :return:
         """
-        H = int((self._columnRightBottom[1] - self._columnRightTop[1]) * 0.01)
+        H = ctx.gauge.kernel_height
         # # H1 = H * 2 + 1`
-        kernel = np.ones((H, 1), np.uint8)
-        dilate = cv2.dilate(self._processCutTarget, kernel, iterations=3)
-        erode = cv2.erode(dilate, kernel, iterations=3)
-        # closing = cv2.morphologyEx(self._processCutTarget, cv2.MORPH_CLOSE, kernel, iterations=30)
+        # 膨胀 3 次 + 腐蚀 3 次, 融合为一次闭运算
+        closing = vertical_morphology(H, (cv2.MORPH_DILATE, 3), (cv2.MORPH_ERODE, 3))
+        erode = closing.apply(ctx.cut_target)
+        # closing = cv2.morphologyEx(ctx.cut_target, cv2.MORPH_CLOSE, kernel, iterations=30)
 
-        if WRITE_PROCESS_IMAGE:
-            cv2.imwrite(self._processOutputDir + "/21_gray.jpg", erode)
+        self._debug_image(ctx, "21_gray.jpg", erode)
         # 将图像转化为HSV格式，便于颜色提取
         img_hsv = cv2.cvtColor(erode, cv2.COLOR_BGR2HSV)
-        # 去除红颜色范围外的其余颜色
-        if color == ColorSeriesEnum.Red:
-            mask0 = cv2.inRange(img_hsv, LOWER_RED1, UPPER_RED1)
-            mask1 = cv2.inRange(img_hsv, LOWER_RED2, UPPER_RED2)
-            mask = mask0 + mask1
-        elif color == ColorSeriesEnum.Green:
-            mask = cv2.inRange(img_hsv, LOWER_GREEN, UPPER_GREEN)
-        elif color == ColorSeriesEnum.Blue:
-            mask = cv2.inRange(img_hsv, LOWER_BLUE, UPPER_BLUE)
-        elif color == ColorSeriesEnum.Yellow:
-            mask = cv2.inRange(img_hsv, LOWER_YELLOW, UPPER_YELLOW)
-        elif color == ColorSeriesEnum.Cyan:
-            mask = cv2.inRange(img_hsv, LOWER_CYAN, UPPER_CYAN)
-        elif color == ColorSeriesEnum.Purple:
-            mask = cv2.inRange(img_hsv, LOWER_PURPLE, UPPER_PURPLE)
-        else:
-            raise AlgorithmProcessException('Unknown ColorSeriesEnum.')
+        # 查表标注颜色系列, 去除指定颜色范围外的其余颜色
+        labeler = color_labeler()
+        mask = labeler.mask(labeler.label(img_hsv), color)
 
         reval_t, thre = cv2.threshold(mask, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
-        # kernel = np.ones((H, 1), np.uint8)
-        dilate2 = cv2.dilate(thre, kernel, iterations=3)
-        self._processBinaryTarget = cv2.erode(dilate2, kernel, iterations=3)
-        # self._processBinaryTarget = dilate2
-        if WRITE_PROCESS_IMAGE:
-            cv2.imwrite(self._processOutputDir + "/22_threshold.jpg", self._processBinaryTarget)
+        ctx.binary_target = closing.apply(thre)
+        # ctx.binary_target = dilate2
+        self._debug_image(ctx, "22_threshold.jpg", ctx.binary_target)
 
-    def _img_contours(self):
+    def _img_contours(self, ctx: LiquidLevelContext):
         """
         图像边界
+            先基于全部轮廓点的批量统计(外接矩形)一次性排除不可能满足条件的轮廓,
+            再仅对剩余少量候选轮廓计算最小矩形框
         :return:
         """
-        contours, hierarchy = cv2.findContours(self._processBinaryTarget, cv2.RETR_LIST, cv2.CHAIN_APPROX_NONE)
+        contours, hierarchy = cv2.findContours(ctx.binary_target, cv2.RETR_LIST, cv2.CHAIN_APPROX_NONE)
+        if len(contours) == 0:
+            raise AlgorithmProcessException('没有检测到符合条件的轮廓区域')
+        min_area_limit = ctx.gauge.full_area * MIN_PRECISION_PERCENT
+        # 中心线换算到 ROI 坐标
+        center_line = ctx.gauge.center_line - ctx.roi_offset[1]
+
+        # 各轮廓外接矩形: 最小矩形框面积不大于外接矩形面积, 中心不低于轮廓最低点
+        lengths = np.fromiter(map(len, contours), dtype=np.intp, count=len(contours))
+        starts = np.zeros_like(lengths)
+        np.cumsum(lengths[:-1], out=starts[1:])
+        points = np.concatenate(contours)[:, 0, :]
+        lower, upper = np.minimum.reduceat(points, starts), np.maximum.reduceat(points, starts)
+        bound_areas = np.prod(upper - lower, axis=1)
+        candidates = np.flatnonzero((bound_areas > min_area_limit) & (upper[:, 1] >= center_line))
+
         min_area, min_contour = None, None
-        full_area = RectUtils.rect_area(self._columnLeftTop, self._columnRightBottom)
-        print("full_area, ", full_area)
-        for cnt in contours:
+        for i in candidates:
+            cnt = contours[i]
             # 最小矩形框
-            rect = cv2.minAreaRect(cnt)
-            center, (w, h), c = rect
+            center, (w, h), c = cv2.minAreaRect(cnt)
             area = RectUtils.rect_area2(w, h)
             if SHOW_PROCESS_IMAGE:
-                self._temp_show_contour(cnt, area)
+                self._temp_show_contour(ctx, cnt, area)
 
             # rect面积大于整个图形面积的10%(防止面积过小的燥点) and  rect中心应当低于整个检测区域中心
-            if full_area * MIN_PRECISION_PERCENT < area and center[1] >= (
-                (self._columnRightBottom[1] - self._columnLeftTop[1]) / 2 + self._columnRightTop[1]):
+            if min_area_limit < area and center[1] >= center_line:
                 # 首次 or 面积最小
                 if min_area is None or area < min_area:
                     min_area, min_contour = area, cnt
-        if min_contour is not None:
-            self._processFinalArea = min_contour
-            print("target_area,", min_area)
-            if SHOW_PROCESS_IMAGE:
-                self._temp_show_contour(min_contour, min_area)
-        else:
+        if min_contour is None:
             raise AlgorithmProcessException('没有检测到符合条件的轮廓区域')
 
-    def _calc_numerical(self):
+        if SHOW_PROCESS_IMAGE:
+            self._temp_show_contour(ctx, min_contour, min_area)
+        # ROI 坐标映射回原图坐标
+        ctx.final_area = min_contour + ctx.roi_offset
+
+    def _calc_numerical(self, ctx: LiquidLevelContext):
         """按液柱占全柱比例计算读数"""
-        full_range = abs(self._rangeDown - self._rangeUp)
-        ch = self._columnRightBottom[1] - self._processFinalLiquid[1]
-        h = self._columnRightBottom[1] - self._columnRightTop[1]
+        gauge = ctx.gauge
+        full_range = abs(gauge.range_down - gauge.range_up)
+        ch = gauge.right_bottom[1] - ctx.final_liquid[1]
+
+        ctx.final_num = ch / gauge.column_height * full_range + gauge.range_down
 
-        self._processFinalNum = ch / h * full_range + self._rangeDown
+    def _locate_liquid(self, ctx: LiquidLevelContext):
+        """
+        切图、二值化、液柱轮廓; 启用 coarse_to_fine 且液柱足够高时先尝试粗到精定位, 粗定位失败时按原流程识别
+        基于轮廓的二值化(质量模型)在缩小图像上易丢失液柱边缘, 仅基于颜色的二值化支持粗定位
+        """
+        c2f = self.coarse_to_fine
+        factor = 1 if c2f is None or not self._coarse_locatable else c2f.factor(ctx.gauge)
+        if factor > 1:
+            try:
+                self._locate_coarse_to_fine(ctx, factor, c2f.band)
+                return
+            except AlgorithmProcessException as e:
+                logging.debug("coarse locate failed, fall back to full resolution: %s", e)
+                ctx.final_area, ctx.final_liquid = None, None
+        # 切图
+        self._img_cut(ctx)
+        self._binarize(ctx)
+        # 液柱轮廓
+        self._img_contours(ctx)
+        ctx.precision = ctx.gauge.precision()
+
+    def _locate_coarse_to_fine(self, ctx: LiquidLevelContext, factor: int, band: int):
+        """
+        粗到精定位液面
+            1. ROI 缩小 factor 倍后按原流程切图、二值化、轮廓, 取轮廓最高点为候选液面
+            2. 在候选液面上下各 band 个粗像素的窄带内做原分辨率二值化(上下补足形态学影响范围),
+               取包含液柱的连通域最高点为液面; 液柱触及窄带上沿/未到达窄带下沿时窄带向液面方向移动
+        窄带内无法确定液面时沿用粗定位结果, 精度为 factor 个像素
+        """
+        gauge = ctx.gauge
+        offset, mask = gauge.cut_mask(ctx.origin_img.shape)
+        x0, y0 = int(offset[0]), int(offset[1])
+        # 裁为 factor 的整数倍, 缩小后每个像素恰好对应 factor x factor 个原像素
+        h, w = mask.shape[0] // factor * factor, mask.shape[1] // factor * factor
+        ctx.roi_offset = offset
+
+        coarse = self._context_class(ctx.instance, ctx.inputs)
+        coarse.gauge = gauge.scaled((x0, y0), factor)
+        coarse.origin_img = cv2.resize(ctx.origin_img[y0:y0 + h, x0:x0 + w], (w // factor, h // factor),
+                                       interpolation=cv2.INTER_AREA)
+        self._img_cut(coarse)
+        self._binarize(coarse)
+        self._img_contours(coarse)
+        ctx.final_area = coarse.final_area * factor + offset
+        points = coarse.final_area[:, 0, :]
+        cx, cy = points[np.argmin(points[:, 1])]
+        x, y = int(cx) * factor + x0, int(cy) * factor + y0
+        ctx.final_liquid, ctx.precision = (x, y), gauge.precision(factor)
+
+        fine = self._context_class(ctx.instance, ctx.inputs)
+        fine.gauge = gauge
+        # 窄带原图坐标 [top, bottom), 至多移动 MAX_BAND_MOVES 次
+        top, height = y - band * factor, (2 * band + 1) * factor
+        roi_top, roi_bottom = y0, y0 + mask.shape[0]
+        for _ in range(MAX_BAND_MOVES + 1):
+            top = min(max(top, roi_top), roi_bottom - height)
+            bottom = top + height
+            # 上下补足形态学影响范围, 保证窄带内的二值化结果与整个 ROI 处理一致
+            lo, hi = max(top - gauge.roi_margin, roi_top), min(bottom + gauge.roi_margin, roi_bottom)
+            fine.cut_target = cv2.bitwise_or(ctx.origin_img[lo:hi, x0:x0 + mask.shape[1]], mask[lo - y0:hi - y0])
+            self._binarize(fine)
+            surface, move = self._band_surface(fine.binary_target[top - lo:bottom - lo], x - x0,
+                                               top == roi_top, bottom == roi_bottom)
+            if surface is not None:
+                ctx.final_liquid, ctx.precision = (surface[0] + x0, surface[1] + top), gauge.precision()
+                return
+            if move == 0:
+                return
+            top += move * (height - factor)
+
+    @staticmethod
+    def _band_surface(binary: np.ndarray, x: int, at_top: bool = False, at_bottom: bool = False):
+        """
+        窄带二值图中液面的位置: 在窄带底行与液柱相连(距 x 最近)的连通域, 取其最高行最左侧的点
+        return:
+            surface: 液面坐标(窄带内), 无法确定时为 None
+            move: 无法确定时窄带的移动方向, -1 向上(液柱触及上沿), 1 向下(底行无液柱), 0 放弃
+        """
+        _, labels = cv2.connectedComponents(binary)
+        columns = np.flatnonzero(labels[-1])
+        if columns.size == 0:
+            return None, 0 if at_bottom else 1
+        liquid = labels == labels[-1, columns[np.argmin(np.abs(columns - x))]]
+        row = int(np.argmax(liquid.any(axis=1)))
+        if row == 0 and not at_top:
+            return None, -1
+        return (int(np.argmax(liquid[row])), row), 0
 
     @abstractmethod
-    def _preprocess(self) -> Any:
+    def _binarize(self, ctx: LiquidLevelContext):
+        """
+        ctx.cut_target -> ctx.binary_target, 由不同分类重写
+        """
+        pass
+
+    @abstractmethod
+    def _preprocess(self, ctx: LiquidLevelContext) -> Any:
         """
         本算法的预处理由不同分类不同策略重写
         """
         pass
 
-    def _do_detect(self, _classify: AlgorithmClassifyEnum, _strategy: AlgorithmStrategyEnum) -> (bool, Any, tuple):
+    def _do_detect(self, ctx: LiquidLevelContext, _classify: AlgorithmClassifyEnum,
+                   _strategy: AlgorithmStrategyEnum) -> (bool, Any, tuple):
         """
         核心检测算法
         return:
@@ -223,48 +486,56 @@ class LiquidLevelReco(AlgorithmBase):
             points: 检测到的关键结果点集(具体每个点含义由各算法自行约定)
 
         """
-        min_w, min_h = None, None
-        # ret, val, points = False, None, None
-        for contour in self._processFinalArea:
-            #  寻找最高点
-            if min_h is None or contour[0][1] < min_h:
-                min_w, min_h = contour[0]
+        if ctx.final_liquid is None:
+            #  寻找最高点(首个 y 最小的点)
+            points = ctx.final_area[:, 0, :]
+            min_w, min_h = points[np.argmin(points[:, 1])]
 
-        self._processFinalLiquid = (min_w, min_h)
+            ctx.final_liquid = (min_w, min_h)
         try:
-            self._calc_numerical()
+            self._calc_numerical(ctx)
         except Exception as e:
-            logging.error(f"检测异常 {e}")
+            logging.error("检测异常 %s", e)
             return False, None, None
 
-        return True, self._processFinalNum, (self._processFinalLiquid,)
+        k = ctx.decode_scale
+        # 降采样解码时坐标映射回原图
+        point = ctx.final_liquid if k == 1 else (ctx.final_liquid[0] * k, ctx.final_liquid[1] * k)
+        return True, ctx.final_num, (point,)
 
     @abstractmethod
-    def _postprocess(self) -> Any:
+    def _postprocess(self, ctx: LiquidLevelContext) -> Any:
         """
         本算法的预处理由不同分类不同策略重写
         """
         pass
 
-    def gen_result_img(self) -> None:
-        if self._processFinalNum is None or self._processFinalArea is None:
+    def gen_result_img(self, ctx: LiquidLevelContext = None) -> None:
+        """
+        生成绘制结果图像, 灰度解码时转为 BGR; 降采样解码时为缩小后的尺寸
+        """
+        ctx = self._last_context() if ctx is None else ctx
+        if ctx is None or ctx.final_num is None or ctx.final_area is None:
             return
 
-        temp = self._originImg.copy()
+        if ctx.origin_img.ndim == 2:
+            temp = cv2.cvtColor(ctx.origin_img, cv2.COLOR_GRAY2BGR)
+        else:
+            temp = ctx.origin_img.copy()
         p_color, t_color, a_color = (0, 0, 255), (60, 255, 0), (0, 255, 255)
 
         # self._resultImg = cv2.drawContours(temp, self.min_area, -1, (0, 255, 255), 1)
-        box = cv2.boxPoints(cv2.minAreaRect(self._processFinalArea))
+        box = cv2.boxPoints(cv2.minAreaRect(ctx.final_area))
         cv2.fillPoly(temp, np.array([box], dtype=np.int32), a_color)
 
-        cv2.circle(temp, self._thresholdUpper, 2, p_color, thickness=-1)
-        cv2.putText(temp, "upper", self._thresholdUpper, cv2.FONT_HERSHEY_PLAIN, 1.0, t_color, thickness=1)
+        cv2.circle(temp, ctx.gauge.threshold_upper, 2, p_color, thickness=-1)
+        cv2.putText(temp, "upper", ctx.gauge.threshold_upper, cv2.FONT_HERSHEY_PLAIN, 1.0, t_color, thickness=1)
 
-        # cv2.circle(temp, self._processFinalLiquid, 2, p_color, thickness=-1)
-        # cv2.putText(temp, "liquid", self._processFinalLiquid, cv2.FONT_HERSHEY_PLAIN, 1.0, t_color, thickness=1)
-        cv2.putText(temp, "{:.1f}".format(self._processFinalNum), self._processFinalLiquid,
+        # cv2.circle(temp, ctx.final_liquid, 2, p_color, thickness=-1)
+        # cv2.putText(temp, "liquid", ctx.final_liquid, cv2.FONT_HERSHEY_PLAIN, 1.0, t_color, thickness=1)
+        cv2.putText(temp, "{:.1f}".format(ctx.final_num), ctx.final_liquid,
                     cv2.FONT_HERSHEY_PLAIN, 1.0,
                     t_color, thickness=2)
 
-        cv2.circle(temp, self._thresholdLower, 2, p_color, thickness=-1)
-        return cv2.putText(temp, "lower", self._thresholdLower, cv2.FONT_HERSHEY_PLAIN, 1.0, t_color, thickness=1)
+        cv2.circle(temp, ctx.gauge.threshold_lower, 2, p_color, thickness=-1)
+        return cv2.putText(temp, "lower", ctx.gauge.threshold_lower, cv2.FONT_HERSHEY_PLAIN, 1.0, t_color, thickness=1)
@@ -1,7 +1,8 @@
 from typing import final, Any
 
 from iapp_v0.algorithm.base.algorithm_base import AlgorithmInput
-from iapp_v0.algorithm.liquid_level.ab_liquid_level_reco import LiquidLevelReco
+from iapp_v0.algorithm.liquid_level.ab_liquid_level_reco import LiquidLevelReco, LiquidLevelContext
+from iapp_v0.algorithm.liquid_level.gauge_config import GaugeConfig
 from iapp_v0.exceptions.custom_exception import AlgorithmProcessException
 
 
@@ -13,19 +14,20 @@ class LiquidLevelRecoSecondary(LiquidLevelReco):
     _name = "LiquidLevelReco.secondary.v1"
     _description = "识别算法.质量模型.版本v1"
     _cn_name = "液位识别算法(质量模型)"
+    _needs_color = False
 
-    def __init__(self, _inputs: AlgorithmInput, _id: int = -1):
-        super(LiquidLevelRecoSecondary, self).__init__(_inputs, _id)
+    def __init__(self, _inputs: AlgorithmInput, _id: int = -1, gauge: GaugeConfig = None):
+        super(LiquidLevelRecoSecondary, self).__init__(_inputs, _id, gauge)
 
-    def _preprocess(self) -> Any:
-        if self._originImg is None:
+    def _preprocess(self, ctx: LiquidLevelContext) -> Any:
+        if ctx.origin_img is None:
             raise AlgorithmProcessException("__originImg can not be None，please check file path/integrity")
-        # 切图
-        self._img_cut()
+        # 切图 + 二值化 + 液柱轮廓
+        self._locate_liquid(ctx)
+
+    def _binarize(self, ctx: LiquidLevelContext):
         # 二值化-根据轮廓
-        self._img_threshold()
-        # 液柱轮廓
-        self._img_contours()
+        self._img_threshold(ctx)
 
-    def _postprocess(self) -> Any:
+    def _postprocess(self, ctx: LiquidLevelContext) -> Any:
         pass
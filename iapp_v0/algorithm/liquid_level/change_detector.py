@@ -0,0 +1,82 @@
+import threading
+
+import cv2
+import numpy as np
+
+from iapp_v0.algorithm.base.algorithm_base import AlgorithmInstance, AlgorithmOutput
+from iapp_v0.algorithm.liquid_level.gauge_config import GaugeConfig
+
+# 缩略图尺寸(宽, 高), 液柱细长, 保留纵向分辨率
+THUMBNAIL_SIZE = (8, 64)
+
+
+class ChangeDetector(object):
+    """
+    单个液位计的画面变化检测, 液位变化缓慢时跳过未变化帧的完整识别
+        将液柱外接矩形缩放为小尺寸缩略图并模糊去噪, 与上次完整识别时的缩略图逐行比较,
+        各行平均灰度差的最大值不超过阈值时沿用上次结果
+    Usage:
+        reco.change_detector = ChangeDetector(threshold=6.0, refresh_every=30)
+        output = reco.read(frame, instance)  # output.carried_forward 表示是否沿用上次结果
+    :threshold 行平均灰度差阈值
+    :refresh_every 至少每 N 帧完整识别一次
+    """
+
+    def __init__(self, threshold: float = 6.0, refresh_every: int = 30, size: tuple = THUMBNAIL_SIZE):
+        if refresh_every < 1:
+            raise ValueError(f"refresh_every must be >= 1, got {refresh_every}")
+        self.threshold = threshold
+        self.refresh_every = refresh_every
+        self.size = size
+
+        self._lock = threading.Lock()
+        self._thumbnail = None
+        self._instance = None
+        self._output = None
+        # 距上次完整识别的帧数
+        self._since = 0
+
+    def thumbnail(self, img: np.ndarray, gauge: GaugeConfig):
+        """
+        液柱区域缩略图, 区域超出图像时返回 None
+        """
+        if img is None:
+            return None
+        x, y, w, h = cv2.boundingRect(np.array(gauge.box, dtype=np.int32))
+        roi = img[max(y, 0):y + h, max(x, 0):x + w]
+        if roi.size == 0:
+            return None
+        thumb = cv2.resize(roi, self.size, interpolation=cv2.INTER_AREA)
+        return cv2.GaussianBlur(thumb, (3, 3), 0)
+
+    def carry(self, thumbnail, instance: AlgorithmInstance):
+        """
+        画面无明显变化且未到强制刷新时, 返回沿用的上次结果, 否则返回 None
+        """
+        if thumbnail is None:
+            return None
+        with self._lock:
+            if self._output is None or instance is not self._instance or self._since + 1 >= self.refresh_every:
+                return None
+            diff = cv2.absdiff(thumbnail, self._thumbnail).reshape(thumbnail.shape[0], -1)
+            if diff.mean(axis=1).max() > self.threshold:
+                return None
+            self._since += 1
+            prev = self._output
+        return AlgorithmOutput(prev.ret, prev.val, prev.points, prev.alarm, prev.level, prev.desc,
+                               carried_forward=True, precision=prev.precision)
+
+    def update(self, thumbnail, instance: AlgorithmInstance, output: AlgorithmOutput):
+        """
+        记录完整识别的结果, 识别失败时不记录, 下一帧重新识别
+        """
+        with self._lock:
+            ok = thumbnail is not None and output.ret
+            self._thumbnail = thumbnail if ok else None
+            self._instance = instance if ok else None
+            self._output = output if ok else None
+            self._since = 0
+
+    def reset(self):
+        with self._lock:
+            self._thumbnail, self._instance, self._output, self._since = None, None, None, 0
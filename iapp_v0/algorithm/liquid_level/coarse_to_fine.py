@@ -0,0 +1,64 @@
+from iapp_v0.algorithm.liquid_level.gauge_config import GaugeConfig
+
+# 默认目标读数分辨率, 量程跨度的百分比
+DEFAULT_COARSE_RESOLUTION_PERCENT = 0.1
+# 缩小后液柱的最小高度(像素)
+MIN_COARSE_HEIGHT = 200
+# 编码图像支持的降采样解码倍数(IMREAD_REDUCED_*)
+REDUCED_DECODE_SCALES = (8, 4, 2)
+
+
+class CoarseToFine(object):
+    """
+    粗到精液位定位, 适用于高分辨率画面中的长液柱
+        1. 在缩小的 ROI 上完成切图、二值化、轮廓, 得到候选液面
+        2. 仅对候选液面附近的窄带做原分辨率二值化, 精修液面位置
+    缩小倍数由液柱高度与目标读数分辨率决定: 粗定位本身即满足目标分辨率, 且缩小后液柱不低于 min_height
+    图像源为文件路径/编码后的 bytes 时, 以不超过缩小倍数的 2/4/8 倍直接降采样解码, 其余倍数再由粗定位缩小,
+    此时精修在降采样后的图像上进行, 精度为降采样倍数个像素(仍满足目标分辨率)
+    Usage:
+        reco.coarse_to_fine = CoarseToFine(resolution=0.5)
+        output = reco.read(frame, instance)  # output.precision 为实际达到的读数精度
+    :resolution 目标读数分辨率(量程单位), 为空时取量程跨度的 DEFAULT_COARSE_RESOLUTION_PERCENT%
+    :min_height 缩小后液柱的最小高度(像素), 保证形态学核与轮廓筛选依然有效
+    :band 精修窄带在候选液面上下各延伸的粗像素数
+    :reduced_decode 是否降采样解码, 需要原分辨率精度时关闭
+    """
+
+    def __init__(self, resolution: float = None, min_height: int = MIN_COARSE_HEIGHT, band: int = 2,
+                 reduced_decode: bool = True):
+        if resolution is not None and resolution <= 0:
+            raise ValueError(f"resolution must be > 0, got {resolution}")
+        if min_height < 1:
+            raise ValueError(f"min_height must be >= 1, got {min_height}")
+        if band < 1:
+            raise ValueError(f"band must be >= 1, got {band}")
+        self.resolution = resolution
+        self.min_height = min_height
+        self.band = band
+        self.reduced_decode = reduced_decode
+
+    def __repr__(self):
+        return f"CoarseToFine(resolution={self.resolution}, min_height={self.min_height}, band={self.band}, " \
+               f"reduced_decode={self.reduced_decode})"
+
+    def factor(self, gauge: GaugeConfig) -> int:
+        """
+        缩小倍数, 为 1 时不缩小(按原流程识别)
+        """
+        unit = gauge.precision()
+        if not unit:
+            return 1
+        resolution = self.resolution
+        if resolution is None:
+            resolution = abs(gauge.range_up - gauge.range_down) * DEFAULT_COARSE_RESOLUTION_PERCENT / 100
+        return max(1, min(int(resolution / unit), int(abs(gauge.column_height) // self.min_height)))
+
+    def decode_scale(self, gauge: GaugeConfig) -> int:
+        """
+        降采样解码倍数, 不超过缩小倍数
+        """
+        if not self.reduced_decode:
+            return 1
+        factor = self.factor(gauge)
+        return next((scale for scale in REDUCED_DECODE_SCALES if scale <= factor), 1)
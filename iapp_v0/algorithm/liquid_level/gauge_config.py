@@ -0,0 +1,140 @@
+import functools
+
+import cv2
+import numpy as np
+
+from iapp_v0.algorithm.base.algorithm_base import AlgorithmInput
+from iapp_v0.exceptions.custom_exception import AlgorithmCheckException, AlgorithmProcessException
+from iapp_v0.utils.utils import RectUtils
+
+# 切图掩码缓存上限
+MASK_CACHE_SIZE = 256
+# 构造液位计配置所需的输入参数
+GAUGE_PARAMS = ("column", "thresholdUpper", "thresholdLower", "rangeUp", "rangeDown")
+
+
+class GaugeConfig(object):
+    """
+    液位计配置, 包含液柱几何与量程, 不可变
+    由几何推导出的 掩码、形态学核高度、液柱面积、中心线 等在构造时一次性计算,
+    同一相机下的所有帧可复用同一个 GaugeConfig
+    :column 液柱四个顶点, 分别为左上、左下、右下、右上
+    :threshold_upper 报警上限点
+    :threshold_lower 报警下限点
+    :range_up 量程上限
+    :range_down 量程下限
+    """
+    __slots__ = ("column", "threshold_upper", "threshold_lower", "range_up", "range_down",
+                 "left_top", "left_bottom", "right_bottom", "right_top", "box",
+                 "column_height", "kernel_height", "full_area", "center_line", "roi_margin")
+
+    def __init__(self, column, threshold_upper, threshold_lower, range_up, range_down):
+        column = tuple(tuple(point) for point in column)
+        if len(column) != 4:
+            raise AlgorithmProcessException(f"Column must have 4 points, got {len(column)}")
+        left_top, left_bottom, right_bottom, right_top = column
+        column_height = right_bottom[1] - right_top[1]
+
+        _set = super(GaugeConfig, self).__setattr__
+        _set("column", column)
+        _set("threshold_upper", tuple(threshold_upper))
+        _set("threshold_lower", tuple(threshold_lower))
+        _set("range_up", range_up)
+        _set("range_down", range_down)
+        _set("left_top", left_top)
+        _set("left_bottom", left_bottom)
+        _set("right_bottom", right_bottom)
+        _set("right_top", right_top)
+        # 切图多边形(整数坐标), 作为掩码缓存的键
+        _set("box", tuple((int(x), int(y)) for x, y in column))
+        _set("column_height", column_height)
+        # 竖向形态学核高度, 液柱高度的 1%
+        _set("kernel_height", int(column_height * 0.01))
+        _set("full_area", RectUtils.rect_area(left_top, right_bottom))
+        # 液柱中心线, 液位轮廓中心应低于该线
+        _set("center_line", (right_bottom[1] - left_top[1]) / 2 + right_top[1])
+        # ROI 边距: 二值化阶段累计 12 次竖向形态学迭代 + 1 次自适应阈值邻域,
+        # 边距覆盖其最大影响范围, 保证 ROI 内的处理结果与整图处理完全一致
+        _set("roi_margin", 13 * (int(column_height * 0.01) + 2))
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f"'{self.__class__.__name__}' is immutable")
+
+    def __delattr__(self, item):
+        raise AttributeError(f"'{self.__class__.__name__}' is immutable")
+
+    def _key(self):
+        return self.column, self.threshold_upper, self.threshold_lower, self.range_up, self.range_down
+
+    def __eq__(self, other):
+        return isinstance(other, GaugeConfig) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __reduce__(self):
+        # 不可变对象, 序列化时按构造参数重建(进程池传参)
+        return GaugeConfig, self._key()
+
+    def __repr__(self):
+        return f"GaugeConfig(column={self.column}, range=({self.range_down}, {self.range_up}))"
+
+    @classmethod
+    def from_inputs(cls, _inputs: AlgorithmInput):
+        """
+        根据算法输入构造, 缺少液位计参数时抛出 AlgorithmCheckException
+        """
+        missing = next((name for name in GAUGE_PARAMS if _inputs.get(name) is None), None)
+        if missing is not None:
+            raise AlgorithmCheckException(f"Missing param named '{missing}' for {cls.__name__}")
+        return cls(_inputs.get("column"), _inputs.get("thresholdUpper"), _inputs.get("thresholdLower"),
+                   _inputs.get("rangeUp"), _inputs.get("rangeDown"))
+
+    def precision(self, pixels: float = 1) -> float:
+        """
+        液面定位误差 pixels 个像素对应的读数(量程单位)
+        """
+        if self.column_height == 0:
+            return None
+        return abs(self.range_up - self.range_down) / abs(self.column_height) * pixels
+
+    def scaled(self, offset, factor: float):
+        """
+        截取 offset 起的局部图像并缩小 factor 倍后对应的液位计配置(粗定位用)
+        """
+        x0, y0 = offset
+
+        def scale(point):
+            return (point[0] - x0) / factor, (point[1] - y0) / factor
+
+        return GaugeConfig([scale(p) for p in self.column], [int(v) for v in scale(self.threshold_upper)],
+                           [int(v) for v in scale(self.threshold_lower)], self.range_up, self.range_down)
+
+    def cut_mask(self, shape: tuple):
+        """
+        指定尺寸图像下的 ROI 偏移及切图掩码(液柱外白色, 液柱内黑色), 按 (图像尺寸, 多边形) 缓存
+        return:
+            offset: ROI 左上角在原图中的坐标
+            mask: 只读掩码
+        """
+        return _cut_mask(tuple(shape), self.box, self.roi_margin)
+
+
+@functools.lru_cache(maxsize=MASK_CACHE_SIZE)
+def _cut_mask(shape: tuple, box: tuple, margin: int):
+    polygon = np.array([box], dtype=np.int32)
+    x, y, w, h = cv2.boundingRect(polygon)
+    img_h, img_w = shape[:2]
+    x0, y0 = max(x - margin, 0), max(y - margin, 0)
+    x1, y1 = min(x + w + margin, img_w), min(y + h + margin, img_h)
+    if x0 >= x1 or y0 >= y1:
+        raise AlgorithmProcessException('液柱区域超出图像范围')
+    offset = np.array((x0, y0), dtype=np.int32)
+
+    # 白
+    mask = np.full((y1 - y0, x1 - x0) + tuple(shape[2:]), 255, dtype=np.uint8)
+    # 黑
+    cv2.fillPoly(mask, polygon - offset, (0, 0, 0))
+    mask.flags.writeable = False
+    offset.flags.writeable = False
+    return offset, mask
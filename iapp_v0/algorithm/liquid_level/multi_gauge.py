@@ -0,0 +1,62 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from iapp_v0.algorithm.base.algorithm_base import AlgorithmInput, AlgorithmInstance, AlgorithmOutput
+from iapp_v0.algorithm.liquid_level.ab_liquid_level_reco import LiquidLevelReco
+from iapp_v0.algorithm.liquid_level.change_detector import ChangeDetector
+from iapp_v0.algorithm.registry import registry
+from iapp_v0.exceptions.custom_exception import AlgorithmCheckException, AlgorithmProcessException
+from iapp_v0.utils.frame_cache import frame_cache
+
+
+class MultiGaugeReader(object):
+    """
+    单帧多液位计识别: 同一画面中的多个液柱共享一次解码, 各液柱的识别分发到线程池并行执行
+    (OpenCV 运算期间释放 GIL)
+    Usage:
+        with MultiGaugeReader([(inputs1, instance1), (inputs2, instance2)], workers=4) as reader:
+            outputs = reader.read(frame)
+    :gauges [(液位计输入(column/range/colorSeries 等, 可不含 imgPath), 算法实例(classify/strategy/报警等))]
+    :workers 线程数
+    :change_threshold 启用逐液位计的画面变化检测, 未变化的液位计沿用上次结果, 参考 ChangeDetector
+    :refresh_every 启用变化检测时, 每个液位计至少每 N 帧完整识别一次
+    """
+
+    def __init__(self, gauges: list[tuple[AlgorithmInput, AlgorithmInstance]], workers: int = None,
+                 change_threshold: float = None, refresh_every: int = 30):
+        # 每个液位计一个已配置的算法对象, 跨帧复用且互不共享可变状态
+        self._gauges = []
+        for _id, (_inputs, instance) in enumerate(gauges):
+            reco = registry.create("LiquidLevelReco", instance.classify, instance.strategy, _inputs, _id)
+            if change_threshold is not None:
+                reco.change_detector = ChangeDetector(change_threshold, refresh_every)
+            self._gauges.append((reco, instance))
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="MultiGaugeReader")
+
+    def read(self, frame) -> list[AlgorithmOutput]:
+        """
+        识别一帧中的全部液位计
+        params:
+            frame: 图像文件路径 / BGR 数组 / 编码后的 bytes, 只解码一次
+        return:
+            与 gauges 顺序一致的 AlgorithmOutput 列表, 单个液位计的异常记录在 AlgorithmOutput.error 中
+        """
+        img = frame_cache.decode(frame)
+        return list(self._executor.map(lambda gauge: _read_one(*gauge, img), self._gauges))
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _read_one(reco: LiquidLevelReco, instance: AlgorithmInstance, img) -> AlgorithmOutput:
+    try:
+        return reco.read(img, instance)
+    except (AlgorithmCheckException, AlgorithmProcessException) as e:
+        logging.error("gauge %s failed: %s", reco['_id'], e.message)
+        return AlgorithmOutput(False, None, (), False, None, None, error=e)
@@ -0,0 +1,175 @@
+import importlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Union
+
+from iapp_v0.constant.constant import AlgorithmClassifyEnum, AlgorithmStrategyEnum
+from iapp_v0.exceptions.custom_exception import AlgorithmCheckException
+
+# 自注册的算法包, 首次查找时导入
+ALGORITHM_PACKAGES = ("iapp_v0.algorithm.liquid_level", "iapp_v0.algorithm.meter")
+
+# 不参与算法对象复用键的输入参数(每次请求各不相同)
+_VOLATILE_INPUTS = frozenset(("imgPath", "kwargs"))
+
+
+def _freeze(value):
+    """
+    将输入参数转换为可哈希的形式, 作为算法对象复用的键
+    """
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class AlgorithmRegistry(object):
+    """
+    算法注册表, 以 (算法名, 算法分类, 算法策略) 为键
+        1. 算法模块以 "模块路径:类名" 的形式注册, 首次使用时才导入
+        2. 维护已配置算法对象的对象池, 相同配置的请求之间复用, 免去重复构造
+    :pool_size 每种配置最多缓存的空闲对象数
+    :max_configs 对象池最多缓存的配置数, 超出后淘汰最久未使用的配置
+    """
+
+    def __init__(self, pool_size: int = 4, max_configs: int = 256):
+        self.pool_size = pool_size
+        self.max_configs = max_configs
+
+        self._entries = {}
+        self._codes = {}
+        self._pools = OrderedDict()
+        self._lock = threading.RLock()
+        self._discovered = False
+
+    def register(self, name: str, classify: AlgorithmClassifyEnum, strategy: AlgorithmStrategyEnum,
+                 target: Union[str, type], code: str = None):
+        """
+        注册算法
+        params:
+            target: 算法类, 或 "模块路径:类名" 形式的字符串(延迟导入)
+            code: 算法 schema 中的 code, 可选
+        """
+        with self._lock:
+            self._entries[(name, classify, strategy)] = target
+            if code is not None:
+                self._codes[code] = name
+
+    def keys(self) -> list[tuple]:
+        self._discover()
+        return list(self._entries.keys())
+
+    def name_of_code(self, code: str) -> str:
+        """
+        根据 schema code 获取算法名
+        """
+        self._discover()
+        name = self._codes.get(code)
+        if name is None:
+            raise AlgorithmCheckException(f"Unsupported algorithm code: {code}")
+        return name
+
+    def get(self, name: str, classify: AlgorithmClassifyEnum, strategy: AlgorithmStrategyEnum) -> type:
+        """
+        获取算法类, 首次使用时导入对应模块
+        """
+        key = (name, classify, strategy)
+        target = self._entries.get(key)
+        if target is None:
+            self._discover()
+            target = self._entries.get(key)
+        if target is None:
+            raise AlgorithmCheckException(f"Unsupported algorithm: {name}.{classify.name}.{strategy.name}")
+        if isinstance(target, str):
+            module_name, clazz_name = target.split(":")
+            target = getattr(importlib.import_module(module_name), clazz_name)
+            with self._lock:
+                self._entries[key] = target
+        return target
+
+    def create(self, name: str, classify: AlgorithmClassifyEnum, strategy: AlgorithmStrategyEnum,
+               _inputs, _id: int = -1):
+        """
+        创建新的算法对象
+        """
+        return self.get(name, classify, strategy)(_inputs, _id)
+
+    @staticmethod
+    def pool_key(name: str, classify: AlgorithmClassifyEnum, strategy: AlgorithmStrategyEnum, _inputs) -> tuple:
+        """
+        算法对象复用键: 算法及除图像源外的输入参数均相同的请求可共用同一个算法对象
+        """
+        return (name, classify, strategy), _freeze({k: v for k, v in _inputs.items() if k not in _VOLATILE_INPUTS})
+
+    def acquire(self, name: str, classify: AlgorithmClassifyEnum, strategy: AlgorithmStrategyEnum, _inputs):
+        """
+        从对象池中取出相同配置(除图像源外的输入参数)的算法对象, 没有空闲对象时新建, 用完后需 release
+        复用的对象绑定本次调用方的图像源, 未指定 frame 的 perform 读取的是调用方的 imgPath
+        """
+        pool_key = self.pool_key(name, classify, strategy, _inputs)
+        algorithm = None
+        with self._lock:
+            idle = self._pools.get(pool_key)
+            if idle:
+                self._pools.move_to_end(pool_key)
+                algorithm = idle.pop()
+        if algorithm is not None:
+            # 已出池, 由本调用方独占
+            algorithm._bind_source(_inputs.get("imgPath"))
+            algorithm._poolKey = pool_key
+            return algorithm
+        algorithm = self.create(name, classify, strategy, _inputs)
+        algorithm._poolKey = pool_key
+        return algorithm
+
+    def release(self, algorithm):
+        """
+        归还算法对象
+        """
+        pool_key = getattr(algorithm, "_poolKey", None)
+        if pool_key is None:
+            return
+        with self._lock:
+            idle = self._pools.get(pool_key)
+            if idle is None:
+                idle = self._pools[pool_key] = []
+                while len(self._pools) > self.max_configs:
+                    self._pools.popitem(last=False)
+            self._pools.move_to_end(pool_key)
+            if len(idle) < self.pool_size:
+                idle.append(algorithm)
+
+    @contextmanager
+    def lease(self, name: str, classify: AlgorithmClassifyEnum, strategy: AlgorithmStrategyEnum, _inputs):
+        """
+        Usage:
+            with registry.lease("LiquidLevelReco", classify, strategy, inputs) as algorithm:
+                output = algorithm.read(frame, instance)
+        """
+        algorithm = self.acquire(name, classify, strategy, _inputs)
+        try:
+            yield algorithm
+        finally:
+            self.release(algorithm)
+
+    def clear_pool(self):
+        with self._lock:
+            self._pools.clear()
+
+    def _discover(self):
+        """
+        导入全部算法包, 由各包在导入时完成注册
+        """
+        if self._discovered:
+            return
+        with self._lock:
+            if not self._discovered:
+                for package in ALGORITHM_PACKAGES:
+                    importlib.import_module(package)
+                self._discovered = True
+
+
+# 默认注册表
+registry = AlgorithmRegistry()
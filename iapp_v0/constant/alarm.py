@@ -1,3 +1,6 @@
+import threading
+import time
+from abc import ABCMeta, abstractmethod
 from enum import Enum
 
 
@@ -26,7 +29,9 @@ class RuleType(Enum):
 class AlarmRule:
     """
     报警规则
+    :stateful 报警结果是否依赖历史读数(有状态的规则不可缓存结果)
     """
+    stateful = False
 
     def __init__(self, rule_type: RuleType, name):
         self.type = rule_type
@@ -51,15 +56,212 @@ class ExceedLimitAlarmRule(AlarmRule):
         self.ll_txt = ll_txt
 
 
-class DeviationAlarmRule(AlarmRule):
+class _TrendState(object):
+    """
+    单个位号的报警状态
+    """
+    __slots__ = ("active", "level", "streak")
 
     def __init__(self):
-        super(DeviationAlarmRule, self).__init__(RuleType.Deviation, "偏差报警")
-    # TODO
+        self.active = False
+        self.level = None
+        # 连续与当前报警状态相反的读数个数
+        self.streak = 0
+
+
+class TrendAlarmRule(AlarmRule, metaclass=ABCMeta):
+    """
+    基于读数序列的报警规则基类, 按位号(tag)保存固定大小的状态, 每个读数 O(1) 时间更新
+        触发: 指标绝对值超过 limit; 恢复: 指标绝对值回落到 limit - deadband 以下
+        连续 hysteresis 个读数满足条件时才改变报警状态, 避免在限值附近反复跳变
+    :limit 报警限
+    :deadband 恢复死区
+    :hysteresis 改变报警状态所需的连续读数个数
+    状态保存在规则对象所在的进程中, 不支持进程池执行(perform_batch / 进程池 AsyncAlgorithmExecutor)
+    """
+    stateful = True
+    # (正向报警等级, 负向报警等级), 由子类定义
+    _levels = (None, None)
+
+    def __init__(self, rule_type: RuleType, name, limit: float, deadband: float = 0.0, hysteresis: int = 1):
+        super(TrendAlarmRule, self).__init__(rule_type, name)
+        if limit <= 0 or deadband < 0 or deadband > limit:
+            raise ValueError(f"Invalid limit/deadband: {limit}/{deadband}")
+        if hysteresis < 1:
+            raise ValueError(f"hysteresis must be >= 1, got {hysteresis}")
+        self.limit = limit
+        self.deadband = deadband
+        self.hysteresis = hysteresis
+        # 位号 -> 状态
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _new_state(self) -> _TrendState:
+        return _TrendState()
 
+    @abstractmethod
+    def _measure(self, state, value: float, timestamp: float):
+        """
+        更新状态并返回本次读数的指标(偏差/变化率), 数据不足时返回 None
+        """
+        pass
 
-class ChangeRateAlarmRule(AlarmRule):
+    @abstractmethod
+    def _describe(self, level: str) -> str:
+        pass
+
+    def evaluate(self, tag, value: float, timestamp: float = None) -> (bool, str, str):
+        """
+        输入位号的一个新读数, 更新并返回报警状态
+        return:
+            ret : 是否报警
+            level: 报警等级
+            desc: 报警描述
+        """
+        with self._lock:
+            state = self._states.get(tag)
+            if state is None:
+                state = self._states[tag] = self._new_state()
+            measure = self._measure(state, value, timestamp)
+            if measure is not None:
+                bound = self.limit - self.deadband if state.active else self.limit
+                violating = abs(measure) > bound
+                if violating != state.active:
+                    state.streak += 1
+                    if state.streak >= self.hysteresis:
+                        state.active, state.streak = violating, 0
+                else:
+                    state.streak = 0
+                if state.active and violating:
+                    state.level = self._levels[1] if measure < 0 else self._levels[0]
+            if not state.active:
+                return False, None, None
+            return True, state.level, self._describe(state.level)
+
+    def reset(self, tag=None):
+        """
+        清空指定位号(为空时为全部位号)的状态
+        """
+        with self._lock:
+            if tag is None:
+                self._states.clear()
+            else:
+                self._states.pop(tag, None)
+
+    @property
+    def history_size(self) -> int:
+        """
+        已保存状态的位号数
+        """
+        return len(self._states)
+
+
+class _DeviationState(_TrendState):
+    __slots__ = ("mean",)
 
     def __init__(self):
-        super(ChangeRateAlarmRule, self).__init__(RuleType.ChangeRate, "变化率报警")
-    # TODO
+        super(_DeviationState, self).__init__()
+        self.mean = None
+
+
+class DeviationAlarmRule(TrendAlarmRule):
+    """
+    偏差报警规则, 读数偏离参考值超过 limit 时报警
+        参考值为给定设定值, 未给定时为该位号读数的指数加权移动平均(等效窗口 window 个读数)
+    :setpoint 设定值, 可选
+    :window 移动平均的等效窗口
+    """
+    _levels = ("DH", "DL")
+
+    def __init__(self, limit: float, setpoint: float = None, window: int = 10, deadband: float = 0.0,
+                 hysteresis: int = 1, h_txt: str = "正偏差报警", l_txt: str = "负偏差报警"):
+        super(DeviationAlarmRule, self).__init__(RuleType.Deviation, "偏差报警", limit, deadband, hysteresis)
+        if window < 1:
+            raise ValueError(f"window must be >= 1, got {window}")
+        self.setpoint = setpoint
+        self.window = window
+        self.alpha = 2 / (window + 1)
+        self.h_txt = h_txt
+        self.l_txt = l_txt
+
+    def _new_state(self) -> _DeviationState:
+        return _DeviationState()
+
+    def _measure(self, state: _DeviationState, value: float, timestamp: float):
+        mean = state.mean
+        state.mean = value if mean is None else mean + self.alpha * (value - mean)
+        if self.setpoint is not None:
+            return value - self.setpoint
+        # 首个读数没有参考值
+        return None if mean is None else value - mean
+
+    def _describe(self, level: str) -> str:
+        return self.h_txt if level == "DH" else self.l_txt
+
+
+class _RateState(_TrendState):
+    __slots__ = ("values", "times", "head", "count", "seq")
+
+    def __init__(self, window: int):
+        super(_RateState, self).__init__()
+        # 环形缓冲区, 保存最近 window 个读数及其时间
+        self.values = [0.0] * window
+        self.times = [0.0] * window
+        self.head = 0
+        self.count = 0
+        self.seq = 0
+
+
+class ChangeRateAlarmRule(TrendAlarmRule):
+    """
+    变化率报警规则, 读数相对 window 个读数之前的变化率超过 limit 时报警
+    :limit 变化率限(每秒, per_second 为 False 时为每个读数)
+    :window 变化率的计算跨度(读数个数)
+    :per_second 按时间计算变化率, 时间默认取读数到达时刻
+    """
+    _levels = ("RH", "RL")
+
+    def __init__(self, limit: float, window: int = 5, per_second: bool = True, deadband: float = 0.0,
+                 hysteresis: int = 1, rise_txt: str = "上升速率报警", fall_txt: str = "下降速率报警"):
+        super(ChangeRateAlarmRule, self).__init__(RuleType.ChangeRate, "变化率报警", limit, deadband, hysteresis)
+        if window < 1:
+            raise ValueError(f"window must be >= 1, got {window}")
+        self.window = window
+        self.per_second = per_second
+        self.rise_txt = rise_txt
+        self.fall_txt = fall_txt
+
+    def _new_state(self) -> _RateState:
+        return _RateState(self.window)
+
+    def _measure(self, state: _RateState, value: float, timestamp: float):
+        if self.per_second:
+            now = time.monotonic() if timestamp is None else timestamp
+        else:
+            now = state.seq
+        state.seq += 1
+
+        rate = None
+        if state.count > 0:
+            # 缓冲区未满时最早的读数在 0 号位, 满后在 head 处
+            oldest = state.head if state.count == self.window else 0
+            elapsed = now - state.times[oldest]
+            if elapsed > 0:
+                rate = (value - state.values[oldest]) / elapsed
+        state.values[state.head] = value
+        state.times[state.head] = now
+        state.head = (state.head + 1) % self.window
+        state.count = min(state.count + 1, self.window)
+        return rate
+
+    def _describe(self, level: str) -> str:
+        return self.rise_txt if level == "RH" else self.fall_txt
@@ -1,29 +1,36 @@
 from enum import Enum
 
-import numpy as np
-
-# 红色区间1
-# https://blog.csdn.net/wanggsx918/article/details/23272669
-LOWER_RED1 = np.array([0, 43, 46])
-UPPER_RED1 = np.array([10, 255, 255])
-# 红色区间2
-LOWER_RED2 = np.array([156, 43, 46])
-UPPER_RED2 = np.array([180, 255, 255])
-# 绿色区间
-LOWER_GREEN = np.array([35, 43, 46])
-UPPER_GREEN = np.array([77, 255, 255])
-# 蓝色区间
-LOWER_BLUE = np.array([100, 43, 46])
-UPPER_BLUE = np.array([124, 255, 255])
-# 橙黄色区间  11-25|26-34
-LOWER_YELLOW = np.array([11, 43, 46])
-UPPER_YELLOW = np.array([34, 255, 255])
-# 青色
-LOWER_CYAN = np.array([78, 43, 46])
-UPPER_CYAN = np.array([99, 255, 255])
-# 紫色
-LOWER_PURPLE = np.array([125, 43, 46])
-UPPER_PURPLE = np.array([155, 255, 255])
+# HSV 颜色区间, numpy 数组在首次访问时构建(见 __getattr__), 避免导入本模块时加载 numpy
+_HSV_BOUNDS = {
+    # 红色区间1
+    # https://blog.csdn.net/wanggsx918/article/details/23272669
+    "LOWER_RED1": (0, 43, 46),
+    "UPPER_RED1": (10, 255, 255),
+    # 红色区间2
+    "LOWER_RED2": (156, 43, 46),
+    "UPPER_RED2": (180, 255, 255),
+    # 绿色区间
+    "LOWER_GREEN": (35, 43, 46),
+    "UPPER_GREEN": (77, 255, 255),
+    # 蓝色区间
+    "LOWER_BLUE": (100, 43, 46),
+    "UPPER_BLUE": (124, 255, 255),
+    # 橙黄色区间  11-25|26-34
+    "LOWER_YELLOW": (11, 43, 46),
+    "UPPER_YELLOW": (34, 255, 255),
+    # 青色
+    "LOWER_CYAN": (78, 43, 46),
+    "UPPER_CYAN": (99, 255, 255),
+    # 紫色
+    "LOWER_PURPLE": (125, 43, 46),
+    "UPPER_PURPLE": (155, 255, 255),
+}
+
+
+# 显式导出, 延迟构建的颜色区间不在模块字典中, 需列出才能被 "import *" 导出(导出时构建)
+__all__ = [  # noqa: F822
+    "ColorSeriesEnum", "AlgorithmOutputTypeEnum", "AlgorithmClassifyEnum", "AlgorithmStrategyEnum",
+    "COLOR_SERIES_RANGES", *_HSV_BOUNDS]
 
 
 class ColorSeriesEnum(Enum):
@@ -53,6 +60,34 @@ class ColorSeriesEnum(Enum):
             raise ValueError(f"'{cls.__name__}' enum not found for '{value}'")
 
 
+# 各颜色系列对应的 HSV 区间名(下限, 上限), 可有多段
+_COLOR_SERIES_BOUNDS = {
+    ColorSeriesEnum.Red: (("LOWER_RED1", "UPPER_RED1"), ("LOWER_RED2", "UPPER_RED2")),
+    ColorSeriesEnum.Green: (("LOWER_GREEN", "UPPER_GREEN"),),
+    ColorSeriesEnum.Blue: (("LOWER_BLUE", "UPPER_BLUE"),),
+    ColorSeriesEnum.Yellow: (("LOWER_YELLOW", "UPPER_YELLOW"),),
+    ColorSeriesEnum.Cyan: (("LOWER_CYAN", "UPPER_CYAN"),),
+    ColorSeriesEnum.Purple: (("LOWER_PURPLE", "UPPER_PURPLE"),),
+}
+
+
+def __getattr__(name):
+    """
+    延迟构建 LOWER_*/UPPER_* 颜色区间数组 及 COLOR_SERIES_RANGES {颜色系列: ((HSV 下限, HSV 上限), ...)}
+    """
+    if name in _HSV_BOUNDS:
+        import numpy as np
+
+        value = np.array(_HSV_BOUNDS[name])
+    elif name == "COLOR_SERIES_RANGES":
+        value = {color: tuple((__getattr__(lower), __getattr__(upper)) for lower, upper in bounds)
+                 for color, bounds in _COLOR_SERIES_BOUNDS.items()}
+    else:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+    globals()[name] = value
+    return value
+
+
 class AlgorithmOutputTypeEnum(Enum):
     # 仅质量位
     QualityOnly = 0
@@ -0,0 +1,367 @@
+"""
+本地推理服务(可选), 仅依赖标准库
+    POST /identify/<schema code>?classify=Primary&colorSeries=Red&column=[[325,116],...]
+        请求体为编码后的图像(jpg/png), 算法输入参数放在查询串中(复杂类型为 JSON)
+    GET /metrics
+        队列深度、吞吐及延迟统计
+    GET /metrics/prometheus
+        算法分阶段耗时及计数(Prometheus 文本格式, 需启用 iapp_v0.utils.metrics)
+Usage:
+    python -m iapp_v0.server --port 5000 --workers 4 --batch-window-ms 5
+    默认只监听本机, 对外提供服务需显式指定 --host 0.0.0.0
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent import futures
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+
+from iapp_v0.algorithm.base.algorithm_base import AlgorithmInput, AlgorithmInstance, AlgorithmOutput
+from iapp_v0.algorithm.registry import registry
+from iapp_v0.constant.alarm import ExceedLimitAlarmRule
+from iapp_v0.constant.constant import AlgorithmClassifyEnum, AlgorithmStrategyEnum, AlgorithmOutputTypeEnum
+from iapp_v0.exceptions.custom_exception import AlgorithmCheckException, AlgorithmProcessException
+from iapp_v0.utils.metrics import metrics
+
+# 属于算法实例(而非算法输入)的查询参数
+INSTANCE_PARAMS = ("classify", "strategy", "alarmRule", "outTemplate")
+# 延迟统计保留的最近请求数
+LATENCY_WINDOW = 1024
+# 默认请求体(编码后的图像)大小上限(字节)
+MAX_BODY_SIZE = 32 << 20
+
+
+class _Request(object):
+    __slots__ = ("key", "name", "instance", "inputs", "frame", "future", "enqueued")
+
+    def __init__(self, name: str, instance: AlgorithmInstance, inputs: AlgorithmInput, frame):
+        self.key = registry.pool_key(name, instance.classify, instance.strategy, inputs)
+        self.name = name
+        self.instance = instance
+        self.inputs = inputs
+        self.frame = frame
+        self.future = Future()
+        self.enqueued = time.monotonic()
+
+
+class ServerMetrics(object):
+    """
+    服务统计: 请求数、失败数、批次数及最近 LATENCY_WINDOW 个请求的延迟(入队至完成)
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.in_flight = 0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+
+    def on_submit(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def on_batch(self):
+        with self._lock:
+            self.batches += 1
+
+    def on_done(self, latency: float, failed: bool):
+        with self._lock:
+            self.in_flight -= 1
+            self.requests += 1
+            self.errors += failed
+            self._latencies.append(latency)
+
+    def snapshot(self, queue_depth: int) -> dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            snapshot = {"queue_depth": queue_depth, "in_flight": self.in_flight, "requests": self.requests,
+                        "errors": self.errors, "batches": self.batches}
+
+        def percentile(q):
+            return round(latencies[int(q * (len(latencies) - 1))] * 1000, 3) if latencies else None
+
+        snapshot["latency_ms"] = {"p50": percentile(0.5), "p90": percentile(0.9), "p99": percentile(0.99),
+                                  "max": percentile(1.0)}
+        return snapshot
+
+
+class MicroBatcher(object):
+    """
+    请求微批处理: 调度线程在 window 时间窗口内收集请求(至多 max_batch 个), 按算法配置分组后分发到线程池,
+    同组请求共用一个从注册表对象池中租用的算法对象, 免去逐请求构造与调度开销
+    :workers 线程池大小
+    :window 收集窗口(秒)
+    :max_batch 单批最大请求数
+    :max_queue 排队上限, 超出时拒绝请求
+    """
+
+    def __init__(self, workers: int = None, window: float = 0.005, max_batch: int = 32, max_queue: int = 1024):
+        self.window = window
+        self.max_batch = max_batch
+        self.metrics = ServerMetrics()
+
+        # 默认线程数与 ThreadPoolExecutor 一致
+        self.workers = workers or min(32, (os.cpu_count() or 1) + 4)
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="MicroBatcher")
+        self._dispatcher = threading.Thread(target=self._dispatch, name="MicroBatcher-dispatch", daemon=True)
+        self._dispatcher.start()
+
+    def submit(self, name: str, instance: AlgorithmInstance, inputs: AlgorithmInput, frame) -> Future:
+        """
+        提交一次识别, 返回 AlgorithmOutput 的 Future
+        """
+        request = _Request(name, instance, inputs, frame)
+        try:
+            self._queue.put_nowait(request)
+        except queue.Full:
+            raise AlgorithmProcessException("Server busy, please retry later", 503)
+        self.metrics.on_submit()
+        return request.future
+
+    def snapshot(self) -> dict:
+        return self.metrics.snapshot(self._queue.qsize())
+
+    def close(self):
+        self._queue.put(None)
+        self._dispatcher.join()
+        self._executor.shutdown(wait=True)
+
+    def _dispatch(self):
+        stopping = False
+        while not stopping:
+            request = self._queue.get()
+            if request is None:
+                break
+            batch = [request]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if request is None:
+                    stopping = True
+                    break
+                batch.append(request)
+
+            self.metrics.on_batch()
+            groups = {}
+            for request in batch:
+                groups.setdefault(request.key, []).append(request)
+            for group in groups.values():
+                # 同组请求均分到各 worker, 同配置的请求也能并行
+                size = math.ceil(len(group) / self.workers)
+                for i in range(0, len(group), size):
+                    self._executor.submit(self._run_group, group[i:i + size])
+
+    def _run_group(self, group: list[_Request]):
+        first = group[0]
+        try:
+            with registry.lease(first.name, first.instance.classify, first.instance.strategy,
+                                first.inputs) as algorithm:
+                for request in group:
+                    self._run_one(algorithm, request)
+        except Exception as e:
+            # 算法对象构造失败
+            for request in group:
+                if not request.future.done():
+                    self._finish(request, exception=e)
+
+    def _run_one(self, algorithm, request: _Request):
+        try:
+            output = AlgorithmOutput(*algorithm.perform(request.instance, request.frame))
+        except Exception as e:
+            self._finish(request, exception=e)
+        else:
+            self._finish(request, output)
+
+    def _finish(self, request: _Request, output: AlgorithmOutput = None, exception: Exception = None):
+        failed = exception is not None or not output.ret
+        self.metrics.on_done(time.monotonic() - request.enqueued, failed)
+        if exception is not None:
+            request.future.set_exception(exception)
+        else:
+            request.future.set_result(output)
+
+
+def parse_query(query: str) -> (AlgorithmInstance, AlgorithmInput):
+    """
+    查询串 -> (算法实例, 算法输入), 输入参数值按 JSON 解析, 解析失败时按字符串处理
+    """
+    raw = dict(parse_qsl(query, keep_blank_values=True))
+    inputs = {}
+    for key, value in raw.items():
+        if key in INSTANCE_PARAMS:
+            continue
+        try:
+            inputs[key] = json.loads(value)
+        except ValueError:
+            inputs[key] = value
+
+    try:
+        classify = AlgorithmClassifyEnum.from_str(raw.get("classify", "Primary"))
+        strategy = AlgorithmStrategyEnum.from_str(raw.get("strategy", "Main"))
+        output_type = AlgorithmOutputTypeEnum.from_str(str(inputs.get("outputType", "ValueQuality")))
+        alarm_rule = raw.get("alarmRule")
+        # 越限报警 [高高限, 高限, 低限, 低低限]
+        alarm_rule = ExceedLimitAlarmRule(*json.loads(alarm_rule)) if alarm_rule else None
+    except (ValueError, TypeError) as e:
+        raise AlgorithmCheckException(f"Wrong instance param: {e}")
+    instance = AlgorithmInstance(classify, strategy, output_type, raw.get("outTemplate"), alarm_rule)
+    return instance, AlgorithmInput(inputs)
+
+
+def _output_to_dict(output: AlgorithmOutput) -> dict:
+    return {"ret": output.ret, "val": output.val, "points": output.points, "alarm": output.alarm,
+            "level": output.level, "desc": output.desc}
+
+
+def _json_default(o):
+    # numpy 标量/数组
+    if hasattr(o, "tolist"):
+        return o.tolist()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class _AlgorithmRequestHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 长连接
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        path = urlsplit(self.path).path.rstrip("/")
+        if path == "/metrics":
+            self._send_json(200, self.server.batcher.snapshot())
+        elif path == "/metrics/prometheus":
+            self._send(200, "text/plain; version=0.0.4; charset=utf-8", metrics.prometheus().encode("utf-8"))
+        else:
+            self._send_json(404, {"error": f"Not found: {self.path}"})
+
+    def do_POST(self):
+        parts = urlsplit(self.path)
+        try:
+            frame = self._read_body()
+        except AlgorithmCheckException as e:
+            # 请求体长度未知或不读取, 连接无法继续复用
+            self.close_connection = True
+            return self._send_json(e.code, {"error": e.message})
+        segments = parts.path.strip("/").split("/")
+        if len(segments) != 2 or segments[0] != "identify":
+            return self._send_json(404, {"error": f"Not found: {parts.path}"})
+        try:
+            name = registry.name_of_code(segments[1])
+        except AlgorithmCheckException as e:
+            return self._send_json(404, {"error": e.message})
+
+        try:
+            if not frame:
+                raise AlgorithmCheckException("Missing image bytes in request body")
+            instance, inputs = parse_query(parts.query)
+            # 入队前校验参数, 缺参/多参的请求不占用队列与 worker
+            ok, msg = registry.get(name, instance.classify, instance.strategy).param_check({**inputs, "imgPath": frame})
+            if not ok:
+                raise AlgorithmCheckException(f"Param check exception: {msg}")
+            future = self.server.batcher.submit(name, instance, inputs, frame)
+            output = future.result(timeout=self.server.request_timeout)
+        except (AlgorithmCheckException, AlgorithmProcessException) as e:
+            self._send_json(e.code, {"error": e.message})
+        except futures.TimeoutError:
+            self._send_json(504, {"error": f"Timed out after {self.server.request_timeout}s"})
+        except Exception as e:
+            logging.exception("identify %s failed", name)
+            self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+        else:
+            self._send_json(200, _output_to_dict(output))
+
+    def _read_body(self) -> bytes:
+        """
+        按 Content-Length 读取请求体, 长度缺失/非法时 400, 超过 max_body_size 时 413
+        """
+        length = self.headers.get("Content-Length")
+        try:
+            length = int(length)
+        except (TypeError, ValueError):
+            raise AlgorithmCheckException(f"Invalid Content-Length: {length}")
+        if length < 0:
+            raise AlgorithmCheckException(f"Invalid Content-Length: {length}")
+        if length > self.server.max_body_size:
+            raise AlgorithmCheckException(f"Request body of {length} bytes exceeds {self.server.max_body_size}",
+                                          413)
+        return self.rfile.read(length)
+
+    def _send_json(self, status: int, body: dict):
+        data = json.dumps(body, ensure_ascii=False, default=_json_default).encode("utf-8")
+        self._send(status, "application/json; charset=utf-8", data)
+
+    def _send(self, status: int, content_type: str, data: bytes):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logging.debug("%s " + format, self.address_string(), *args)
+
+
+class AlgorithmHTTPServer(ThreadingHTTPServer):
+    """
+    算法推理服务, 按 schema code 路由到注册表中的算法
+    Usage:
+        with AlgorithmHTTPServer(("127.0.0.1", 5000), workers=4) as server:
+            server.serve_forever()
+    :request_timeout 单个请求等待识别结果的超时时间(秒)
+    :max_body_size 请求体大小上限(字节)
+    """
+    daemon_threads = True
+
+    def __init__(self, address: tuple, workers: int = None, batch_window: float = 0.005, max_batch: int = 32,
+                 max_queue: int = 1024, request_timeout: float = 30.0, max_body_size: int = MAX_BODY_SIZE):
+        self.batcher = MicroBatcher(workers, batch_window, max_batch, max_queue)
+        self.request_timeout = request_timeout
+        self.max_body_size = max_body_size
+        super(AlgorithmHTTPServer, self).__init__(address, _AlgorithmRequestHandler)
+
+    def server_close(self):
+        super(AlgorithmHTTPServer, self).server_close()
+        self.batcher.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="iapp_v0 algorithm server")
+    # 默认只监听本机, 需显式指定 0.0.0.0 才对外暴露
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-window-ms", type=float, default=5.0)
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--max-queue", type=int, default=1024)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--max-body-mb", type=float, default=MAX_BODY_SIZE / (1 << 20))
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    metrics.enable()
+    with AlgorithmHTTPServer((args.host, args.port), args.workers, args.batch_window_ms / 1000, args.max_batch,
+                             args.max_queue, args.timeout, int(args.max_body_mb * (1 << 20))) as server:
+        logging.info("algorithm server listening on %s:%s", args.host, args.port)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
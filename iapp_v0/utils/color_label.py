@@ -0,0 +1,63 @@
+import functools
+
+import cv2
+import numpy as np
+
+from iapp_v0.constant.constant import ColorSeriesEnum, COLOR_SERIES_RANGES
+from iapp_v0.exceptions.custom_exception import AlgorithmProcessException
+
+
+class ColorLabeler(object):
+    """
+    基于查找表的颜色分割
+        每个 HSV 区间占用标签图中的 1 位, H/S/V 各一张 256 项查找表, 表项为该通道值所落入区间的位集合,
+        三张表查表结果按位与即得到像素所属的全部区间, 一次查表即可为每个像素标注颜色系列,
+        任意颜色组合的掩码都可从同一张标签图中提取
+    :ranges {颜色系列: ((HSV 下限, HSV 上限), ...)}
+    """
+
+    def __init__(self, ranges: dict = None):
+        ranges = COLOR_SERIES_RANGES if ranges is None else ranges
+        segments = [(color, lower, upper) for color, bounds in ranges.items() for lower, upper in bounds]
+        if len(segments) > 8:
+            raise ValueError(f"At most 8 HSV ranges are supported, got {len(segments)}")
+
+        self.luts = [np.zeros(256, dtype=np.uint8) for _ in range(3)]
+        # 颜色系列 -> 对应区间的位集合
+        self.bits = {}
+        for i, (color, lower, upper) in enumerate(segments):
+            bit = 1 << i
+            for lut, low, high in zip(self.luts, lower, upper):
+                lut[int(low):int(high) + 1] |= bit
+            self.bits[color] = self.bits.get(color, 0) | bit
+        for lut in self.luts:
+            lut.flags.writeable = False
+
+    def label(self, img_hsv: np.ndarray) -> np.ndarray:
+        """
+        HSV 图像 -> 标签图, 每个像素的值为其所落入区间的位集合
+        """
+        h, s, v = cv2.split(img_hsv)
+        labels = cv2.LUT(h, self.luts[0])
+        cv2.bitwise_and(labels, cv2.LUT(s, self.luts[1]), dst=labels)
+        cv2.bitwise_and(labels, cv2.LUT(v, self.luts[2]), dst=labels)
+        return labels
+
+    def mask(self, labels: np.ndarray, *colors: ColorSeriesEnum) -> np.ndarray:
+        """
+        从标签图中提取若干颜色系列的二值掩码(255/0), 与 cv2.inRange 输出一致
+        """
+        bits = 0
+        for color in colors:
+            if color not in self.bits:
+                raise AlgorithmProcessException('Unknown ColorSeriesEnum.')
+            bits |= self.bits[color]
+        return cv2.compare(cv2.bitwise_and(labels, bits), 0, cv2.CMP_GT)
+
+
+@functools.lru_cache(maxsize=1)
+def color_labeler() -> ColorLabeler:
+    """
+    默认颜色系列区间的 ColorLabeler, 首次使用时构建
+    """
+    return ColorLabeler()
@@ -0,0 +1,97 @@
+import itertools
+import logging
+import os
+import queue
+import threading
+
+import cv2
+
+
+class DebugSession(object):
+    """
+    单次算法调用的中间过程图片集合
+    :name 输出子目录名
+    :images [(文件名, 图像)]
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.images = []
+
+    def add(self, filename: str, img):
+        self.images.append((filename, img))
+
+
+class DebugCapture(object):
+    """
+    中间过程图片采集器, 默认不启用; 启用方式:
+        algorithm.debug_capture = DebugCapture("/data/debug", sample_rate=100)
+    :output_dir 输出根目录, 每次被采样的调用写入独立的子目录
+    :sample_rate 采样率, 每 N 次调用采集 1 次
+    :only_failure 为 True 时仅在识别失败时输出
+    :queue_size 后台写入队列长度, 队列满时丢弃本次采集, 不阻塞识别
+    """
+
+    def __init__(self, output_dir: str, sample_rate: int = 1, only_failure: bool = False, queue_size: int = 16):
+        if sample_rate < 1:
+            raise ValueError(f"sample_rate must be >= 1, got {sample_rate}")
+        self.output_dir = output_dir
+        self.sample_rate = sample_rate
+        self.only_failure = only_failure
+        # 因队列满而丢弃的采集次数
+        self.dropped = 0
+
+        self._counter = itertools.count()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._writer = None
+        self._lock = threading.Lock()
+
+    def begin(self, tag: str):
+        """
+        开始一次调用的采集, 未被采样时返回 None
+        """
+        seq = next(self._counter)
+        if seq % self.sample_rate != 0:
+            return None
+        return DebugSession(f"{tag}_{os.getpid()}_{seq:08d}")
+
+    def commit(self, session: DebugSession, success: bool):
+        """
+        结束一次调用的采集, 图像拷贝后交由后台线程编码写盘
+        """
+        if session is None or not session.images or (self.only_failure and success):
+            return
+        # 原图可能由调用方复用(如相机采集缓冲区), 入队前拷贝
+        images = [(filename, img.copy()) for filename, img in session.images]
+        try:
+            self._queue.put_nowait((os.path.join(self.output_dir, session.name), images))
+        except queue.Full:
+            self.dropped += 1
+            return
+        self._ensure_writer()
+
+    def flush(self):
+        """
+        等待队列中的图片全部写盘
+        """
+        self._queue.join()
+
+    def _ensure_writer(self):
+        if self._writer is not None:
+            return
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="DebugCaptureWriter", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self):
+        while True:
+            path, images = self._queue.get()
+            try:
+                os.makedirs(path, exist_ok=True)
+                for filename, img in images:
+                    cv2.imwrite(os.path.join(path, filename), img)
+            except Exception as e:
+                logging.error("debug capture write failed %s: %s", path, e)
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,93 @@
+import os
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from iapp_v0.utils.utils import ImageUtils
+
+# 默认缓存上限(字节), 约 5 张 4K BGR 图像
+DEFAULT_MAX_BYTES = 128 << 20
+
+
+class FrameCache(object):
+    """
+    进程内已解码图像缓存, 以 (文件路径, 修改时间, 文件大小, 解码方式) 为键, 按占用内存淘汰最久未使用的图像
+        同一文件被多个算法对象、多次调用读取时只解码一次, 文件被修改后自动重新解码
+        缓存的图像只读, 调用方不可原地修改
+    Usage:
+        from iapp_v0.utils.frame_cache import frame_cache
+        img = frame_cache.decode(src, cv2.IMREAD_GRAYSCALE)
+    :max_bytes 缓存图像的总字节数上限, 为 0 时不缓存
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        if max_bytes < 0:
+            raise ValueError(f"max_bytes must be >= 0, got {max_bytes}")
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def decode(self, src, flags: int = cv2.IMREAD_COLOR):
+        """
+        读取图像源, 文件路径经缓存解码, 其余图像源同 ImageUtils.imread
+        """
+        if isinstance(src, (str, os.PathLike)):
+            return self.imread(src, flags)
+        return ImageUtils.imread(src, flags)
+
+    def imread(self, path, flags: int = cv2.IMREAD_COLOR) -> np.ndarray:
+        """
+        读取图像文件, 读取失败时返回 None, 与 cv2.imread 保持一致
+        """
+        path = os.path.abspath(os.fspath(path))
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        key = (path, st.st_mtime_ns, st.st_size, flags)
+        with self._lock:
+            img = self._entries.get(key)
+            if img is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return img
+            self.misses += 1
+
+        img = ImageUtils.imread(path, flags)
+        if img is None or img.nbytes > self.max_bytes:
+            return img
+        img.flags.writeable = False
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = img
+                self.nbytes += img.nbytes
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+                self.evictions += 1
+        return img
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {"size": len(self._entries), "bytes": self.nbytes, "hits": self.hits, "misses": self.misses,
+                    "hit_rate": self.hits / total if total else 0.0, "evictions": self.evictions}
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# 进程内默认缓存
+frame_cache = FrameCache()
@@ -0,0 +1,158 @@
+import bisect
+import threading
+import time
+
+# 阶段耗时直方图的默认分桶上界(秒)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# perform 的各阶段
+STAGES = ("param_check", "decode", "preprocess", "detect", "alarm", "postprocess", "output_format")
+
+
+class Histogram(object):
+    """
+    固定分桶直方图, 各桶计数非累计, 导出时再累计
+    """
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        # 最后一个桶为 +Inf
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple]:
+        """
+        [(上界, 累计计数)], 上界 None 表示 +Inf
+        """
+        ret, total = [], 0
+        for bound, count in zip(self.bounds + (None,), self.counts):
+            total += count
+            ret.append((bound, total))
+        return ret
+
+
+class StageTimer(object):
+    """
+    单次 perform 的分阶段计时, 每次 lap 记录自上次 lap 以来的耗时
+    """
+    __slots__ = ("_metrics", "_labels", "_last")
+
+    def __init__(self, metrics, algorithm: str, classify: str):
+        self._metrics = metrics
+        self._labels = (algorithm, classify)
+        self._last = time.perf_counter()
+
+    def lap(self, stage: str):
+        now = time.perf_counter()
+        self._metrics.observe(*self._labels, stage, now - self._last)
+        self._last = now
+
+    def count(self, name: str, **labels):
+        self._metrics.inc(name, algorithm=self._labels[0], classify=self._labels[1], **labels)
+
+
+class Metrics(object):
+    """
+    算法运行指标, 默认关闭; 关闭时 perform 仅多一次属性判断
+        1. 各阶段耗时直方图, 按 (算法, 算法分类, 阶段) 区分
+        2. 成功/失败/报警 计数, 按 (算法, 算法分类) 区分
+    Usage:
+        from iapp_v0.utils.metrics import metrics
+        metrics.enable()
+        ...
+        metrics.snapshot() / metrics.prometheus()
+    :buckets 直方图分桶上界(秒)
+    """
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.enabled = False
+        self.buckets = tuple(buckets)
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def timer(self, algorithm: str, classify: str):
+        """
+        本次调用的分阶段计时器, 未启用时返回 None
+        """
+        return StageTimer(self, algorithm, classify) if self.enabled else None
+
+    def observe(self, algorithm: str, classify: str, stage: str, seconds: float):
+        key = (algorithm, classify, stage)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def inc(self, name: str, value: int = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def snapshot(self) -> dict:
+        """
+        当前指标快照
+        return:
+            {"histograms": [{algorithm, classify, stage, count, sum, buckets: [[上界, 累计计数]]}],
+             "counters": [{name, labels, value}]}
+        """
+        with self._lock:
+            histograms = [{"algorithm": algorithm, "classify": classify, "stage": stage, "count": h.count,
+                           "sum": h.sum, "buckets": [list(b) for b in h.cumulative()]}
+                          for (algorithm, classify, stage), h in self._histograms.items()]
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in self._counters.items()]
+        return {"histograms": histograms, "counters": counters}
+
+    def prometheus(self, prefix: str = "iapp") -> str:
+        """
+        Prometheus 文本格式导出
+        """
+        snapshot = self.snapshot()
+        lines = [f"# HELP {prefix}_stage_latency_seconds Latency of each perform stage.",
+                 f"# TYPE {prefix}_stage_latency_seconds histogram"]
+        for h in sorted(snapshot["histograms"], key=lambda h: (h["algorithm"], h["classify"], h["stage"])):
+            labels = _labels(algorithm=h["algorithm"], classify=h["classify"], stage=h["stage"])
+            for bound, count in h["buckets"]:
+                le = "+Inf" if bound is None else repr(float(bound))
+                lines.append(f"{prefix}_stage_latency_seconds_bucket{{{labels},le=\"{le}\"}} {count}")
+            lines.append(f"{prefix}_stage_latency_seconds_sum{{{labels}}} {h['sum']!r}")
+            lines.append(f"{prefix}_stage_latency_seconds_count{{{labels}}} {h['count']}")
+
+        names = sorted({c["name"] for c in snapshot["counters"]})
+        for name in names:
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            for c in sorted((c for c in snapshot["counters"] if c["name"] == name),
+                            key=lambda c: sorted(c["labels"].items())):
+                lines.append(f"{prefix}_{name}_total{{{_labels(**c['labels'])}}} {c['value']}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(**labels) -> str:
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+    return ",".join(f"{k}=\"{escape(v)}\"" for k, v in sorted(labels.items()))
+
+
+# 进程内默认指标
+metrics = Metrics()
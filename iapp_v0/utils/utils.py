@@ -1,8 +1,10 @@
+import itertools
 import json
 import os
 from typing import AnyStr
 
 import cv2
+import numpy as np
 
 from iapp_v0.algorithm.base.algorithm_base import AlgorithmParam
 
@@ -39,5 +41,55 @@ class RectUtils:
         return abs(w * h)
 
 
+class ImageUtils:
+    """
+    图像相关 工具类
+    """
+
+    @staticmethod
+    def imread(src, flags: int = cv2.IMREAD_COLOR):
+        """
+        读取图像源, 支持:
+            str / PathLike: 图像文件路径, 使用 cv2.imread 读取
+            np.ndarray: 已解码的 BGR 图像, 直接引用(零拷贝)
+            bytes / bytearray / memoryview: jpg/png 等编码后的图像数据, 使用 cv2.imdecode 解码
+        读取失败时返回 None, 与 cv2.imread 保持一致
+        """
+        if src is None or isinstance(src, np.ndarray):
+            return src
+        if isinstance(src, (bytes, bytearray, memoryview)):
+            buf = np.frombuffer(src, dtype=np.uint8)
+            return cv2.imdecode(buf, flags) if buf.size > 0 else None
+        return cv2.imread(os.fspath(src), flags)
 
 
+class VideoUtils:
+    """
+    视频相关 工具类
+    """
+
+    @staticmethod
+    def frames(source, every_n: int = 1):
+        """
+        逐帧读取视频, 生成器形式, 内存占用与视频时长无关
+        params:
+            source: cv2.VideoCapture 可打开的视频文件路径 / 设备号 / 流地址
+            every_n: 每 N 帧读取 1 帧, 跳过的帧只 grab 不解码
+        """
+        if every_n < 1:
+            raise ValueError(f"every_n must be >= 1, got {every_n}")
+        capture = cv2.VideoCapture(source)
+        if not capture.isOpened():
+            raise IOError(f"Can not open video source: {source}")
+        try:
+            for index in itertools.count():
+                if index % every_n != 0:
+                    if not capture.grab():
+                        break
+                    continue
+                ok, frame = capture.read()
+                if not ok:
+                    break
+                yield frame
+        finally:
+            capture.release()
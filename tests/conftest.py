@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+
+"""Shared fixtures: the sample gauge images and the input / instance factories."""
+import os
+
+import pytest
+
+from iapp_v0.algorithm.base.algorithm_base import AlgorithmInstance, AlgorithmInput
+from iapp_v0.constant.constant import AlgorithmClassifyEnum, AlgorithmStrategyEnum, AlgorithmOutputTypeEnum
+
+input_dir = os.path.join(os.path.dirname(__file__), "resources", "input")
+
+
+@pytest.fixture
+def img_path():
+    return os.path.join(input_dir, "ywj010.jpg")
+
+
+@pytest.fixture
+def other_path():
+    return os.path.join(input_dir, "ywj002.jpg")
+
+
+@pytest.fixture
+def gen_inputs(img_path):
+    """ywj010.jpg 中红色液位计的算法输入, src 为图像源, 其余参数可覆盖"""
+
+    def gen_inputs(src=img_path, **kwargs):
+        params = {"imgPath": src,
+                  "colorSeries": "Red",
+                  "rangeUp": 50, "rangeDown": -30,
+                  "thresholdUpper": [335, 157], "thresholdLower": [335, 217],
+                  "column": [[325, 116], [337, 310], [346, 310], [331, 115]],
+                  "outputType": "ValueQuality"}
+        params.update(kwargs)
+        return AlgorithmInput(params)
+
+    return gen_inputs
+
+
+@pytest.fixture
+def gen_instance():
+    def gen_instance(classify=AlgorithmClassifyEnum.Primary, output_type=AlgorithmOutputTypeEnum.ValueQuality,
+                     **kwargs):
+        return AlgorithmInstance(classify, AlgorithmStrategyEnum.Main, output_type, **kwargs)
+
+    return gen_instance
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+
+"""Tests for the streaming deviation / change rate alarm rules."""
+import pickle
+
+import pytest
+
+from benchmarks.synthetic import sight_glass
+from iapp_v0.algorithm.base.algorithm_base import AlgorithmInstance, AlgorithmInput
+from iapp_v0.algorithm.base.result_cache import ResultCache
+from iapp_v0.algorithm.liquid_level.ab_liquid_level_reco_primary import LiquidLevelRecoPrimary
+from iapp_v0.constant.alarm import DeviationAlarmRule, ChangeRateAlarmRule, TrendAlarmRule, RuleType
+from iapp_v0.constant.constant import AlgorithmClassifyEnum, AlgorithmStrategyEnum, AlgorithmOutputTypeEnum
+from iapp_v0.exceptions.custom_exception import AlgorithmCheckException
+
+
+def feed(rule, values, tag="T1", times=None):
+    times = times or [None] * len(values)
+    return [rule.evaluate(tag, value, t)[1] for value, t in zip(values, times)]
+
+
+def test_deviation_setpoint_deadband_and_hysteresis():
+    rule = DeviationAlarmRule(limit=5, setpoint=50, deadband=2)
+    assert feed(rule, [50, 56, 54, 53.5, 52, 40, 50]) == [None, "DH", "DH", "DH", None, "DL", None]
+
+    rule = DeviationAlarmRule(limit=5, setpoint=50, hysteresis=2)
+    assert feed(rule, [56, 50, 56, 57, 50, 57, 50, 50]) == [None, None, None, "DH", "DH", "DH", "DH", None]
+
+
+def test_deviation_from_moving_average():
+    rule = DeviationAlarmRule(limit=5, window=4)
+    levels = feed(rule, [10] * 5 + [20] + [20] * 10)
+    assert levels[:5] == [None] * 5
+    assert levels[5] == "DH"
+    # 移动平均跟上新的水平后恢复
+    assert levels[-1] is None
+    assert rule.evaluate("T1", 20)[2] is None
+
+
+def test_change_rate_ring_buffer():
+    rule = ChangeRateAlarmRule(limit=1.5, window=2, per_second=False)
+    assert feed(rule, [0, 1, 2, 5, 9, 9, 9, 9, 4]) == [None, None, None, "RH", "RH", "RH", None, None, "RL"]
+    state = rule._states["T1"]
+    assert len(state.values) == 2 and state.count == 2
+
+    rule = ChangeRateAlarmRule(limit=0.5, window=1)
+    assert feed(rule, [0, 1, 1.2], times=[0.0, 1.0, 2.0]) == [None, "RH", None]
+
+
+def test_tags_are_independent_and_picklable():
+    rule = ChangeRateAlarmRule(limit=1, window=1, per_second=False)
+    assert feed(rule, [0, 5], tag="A") == [None, "RH"]
+    assert feed(rule, [0, 0.5], tag="B") == [None, None]
+    assert rule.history_size == 2
+
+    restored = pickle.loads(pickle.dumps(rule))
+    assert restored.evaluate("A", 10) == (True, "RH", "上升速率报警")
+    rule.reset("A")
+    assert rule.evaluate("A", 10) == (False, None, None)
+
+
+def test_perform_evaluates_rule_per_tag():
+    rule = ChangeRateAlarmRule(limit=5, window=1, per_second=False)
+    glasses = [sight_glass(level=level) for level in (0.3, 0.32, 0.6)]
+    reco = LiquidLevelRecoPrimary(AlgorithmInput(glasses[0].inputs()))
+    # 有状态的规则不走结果缓存
+    reco.result_cache = ResultCache()
+
+    def perform(glass, tag):
+        instance = AlgorithmInstance(AlgorithmClassifyEnum.Primary, AlgorithmStrategyEnum.Main,
+                                     AlgorithmOutputTypeEnum.AlarmLevel, alarm_rule=rule, tag=tag)
+        return reco.perform(instance, glass.img)[3:5]
+
+    assert [perform(glass, "LT-101") for glass in glasses] == [(False, None), (False, None), (True, "RH")]
+    assert perform(glasses[2], "LT-101") == (False, None)
+    assert perform(glasses[2], "LT-102") == (False, None)
+    assert len(reco.result_cache) == 0
+
+
+@pytest.mark.parametrize("kwargs", [{"limit": 0}, {"limit": 1, "deadband": 2}, {"limit": 1, "hysteresis": 0},
+                                    {"limit": 1, "window": 0}])
+def test_invalid_config(kwargs):
+    with pytest.raises(ValueError):
+        ChangeRateAlarmRule(**kwargs)
+
+
+def test_fresh_rule_is_truthy():
+    rule = DeviationAlarmRule(limit=5)
+    assert rule.history_size == 0 and rule
+
+
+def test_trend_rule_is_abstract():
+    with pytest.raises(TypeError):
+        TrendAlarmRule(RuleType.Deviation, "偏差报警", 1)
+
+
+def test_process_pool_rejects_stateful_rule():
+    rule = ChangeRateAlarmRule(limit=5, window=1, per_second=False)
+    instance = AlgorithmInstance(AlgorithmClassifyEnum.Primary, AlgorithmStrategyEnum.Main,
+                                 AlgorithmOutputTypeEnum.AlarmLevel, alarm_rule=rule, tag="LT-101")
+    inputs = [AlgorithmInput(sight_glass(level=level).inputs()) for level in (0.3, 0.6)]
+    with pytest.raises(AlgorithmCheckException):
+        LiquidLevelRecoPrimary.perform_batch(inputs, instance, workers=2)
+
+    # 当前进程内顺序执行时状态正常更新
+    outputs = LiquidLevelRecoPrimary.perform_batch(inputs, instance, workers=1)
+    assert [output.alarm for output in outputs] == [False, True]
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+
+"""Tests for the vectorized exceed limit alarm engine."""
+import numpy as np
+
+from benchmarks.synthetic import sight_glass
+from iapp_v0.algorithm.base.alarm_engine import exceed_limit, exceed_limit_alarm, ExceedLimitTable, NO_ALARM
+from iapp_v0.algorithm.base.algorithm_base import AlgorithmInstance, AlgorithmInput
+from iapp_v0.algorithm.liquid_level.ab_liquid_level_reco_primary import LiquidLevelRecoPrimary
+from iapp_v0.constant.alarm import ExceedLimitAlarmRule
+from iapp_v0.constant.constant import AlgorithmClassifyEnum, AlgorithmStrategyEnum, AlgorithmOutputTypeEnum
+
+
+def test_priority_ordering():
+    values = np.array([100, 90, 80, 50, 20, 10, 0, np.nan])
+    alarm, level = exceed_limit(values, 90, 80, 20, 10)
+    assert alarm.tolist() == [True, True, True, False, True, True, True, False]
+    # HH > H > LL > L, 低于低低限时报 LL 而不是 L
+    assert level.tolist() == [0, 0, 1, NO_ALARM, 2, 3, 3, NO_ALARM]
+
+
+def test_table_broadcasts_over_history():
+    rules = [ExceedLimitAlarmRule(90, 80, 20, 10), ExceedLimitAlarmRule(47, 17, -1, -15, l_txt="偏低", ll_txt=None)]
+    table = ExceedLimitTable(rules)
+    values = np.array([[50, 20], [85, -20], [5, -5]])
+    alarm, level = table.evaluate(values)
+    assert alarm.tolist() == [[False, True], [True, True], [True, True]]
+
+    names, descs = table.describe(level)
+    assert names.tolist() == [[None, "H"], ["H", "LL"], ["LL", "L"]]
+    assert descs.tolist() == [[None, "越高限报警"], ["越高限报警", "越低低限报警"], ["越低低限报警", "偏低"]]
+
+
+def test_empty_table():
+    table = ExceedLimitTable([])
+    assert len(table) == 0
+    alarm, level = table.evaluate(np.empty((3, 0)))
+    assert alarm.shape == level.shape == (3, 0)
+    names, descs = table.describe(level)
+    assert names.shape == descs.shape == (3, 0)
+    assert table.evaluate([])[0].shape == (0,)
+
+
+def test_scalar_matches_bulk():
+    rule = ExceedLimitAlarmRule(47, 17, -1, -15, hh_txt="过高")
+    values = np.linspace(-30, 60, 181)
+    table = ExceedLimitTable([rule] * len(values))
+    _, level = table.evaluate(values)
+    names, descs = table.describe(level)
+    for value, name, desc in zip(values, names, descs):
+        assert exceed_limit_alarm(rule, value) == (name is not None, name, desc)
+
+
+def test_perform_reports_low_low():
+    glass = sight_glass(level=0.3)
+    reco = LiquidLevelRecoPrimary(AlgorithmInput(glass.inputs()))
+    instance = AlgorithmInstance(AlgorithmClassifyEnum.Primary, AlgorithmStrategyEnum.Main,
+                                 AlgorithmOutputTypeEnum.AlarmLevel,
+                                 alarm_rule=ExceedLimitAlarmRule(90, 80, 60, 50))
+    assert reco.perform(instance)[3:] == (True, "LL", "越低低限报警")
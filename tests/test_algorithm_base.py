@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+
+"""Tests for `iapp_v0.algorithm.base` package."""
+import pytest
+
+from iapp_v0.algorithm.base.algorithm_base import AlgorithmParam, ParamValidator, AlgorithmInput
+from iapp_v0.algorithm.registry import AlgorithmRegistry, registry as default_registry
+from iapp_v0.constant.constant import AlgorithmClassifyEnum, AlgorithmStrategyEnum
+from iapp_v0.exceptions.custom_exception import AlgorithmCheckException
+
+
+def gen_validator():
+    params = {"imgPath": AlgorithmParam("imgPath", "", "", str, ()),
+              "rangeUp": AlgorithmParam("rangeUp", "", "", float, (-100, 100)),
+              "colorSeries": AlgorithmParam("colorSeries", "", "", str, ("Red", "Green")),
+              "liquid": AlgorithmParam("liquid", "", "", tuple, (), nullable=True)}
+    return ParamValidator("test", params)
+
+
+def test_param_validator():
+    validator = gen_validator()
+
+    assert validator.check({"imgPath": "a.jpg", "rangeUp": 50.5, "colorSeries": "Red", "kwargs": {}}) == (True, "")
+    assert validator.check({"imgPath": "a.jpg", "rangeUp": 50})[1] == "Missing param named 'colorSeries' for test"
+    assert not validator.check({"imgPath": "a.jpg", "rangeUp": 101, "colorSeries": "Red"})[0]
+    assert not validator.check({"imgPath": "a.jpg", "rangeUp": 1, "colorSeries": "Blue"})[0]
+    assert not validator.check({"imgPath": None, "rangeUp": 1, "colorSeries": "Red"})[0]
+    assert not validator.check({"imgPath": "a.jpg", "rangeUp": 1, "colorSeries": "Red", "other": 1})[0]
+
+
+def test_registry_lazy_get_and_pool():
+    registry = AlgorithmRegistry()
+    registry.register("LiquidLevelReco", AlgorithmClassifyEnum.Primary, AlgorithmStrategyEnum.Main,
+                      "iapp_v0.algorithm.liquid_level.ab_liquid_level_reco_primary:LiquidLevelRecoPrimary",
+                      code="CODE_10093")
+    clazz = registry.get("LiquidLevelReco", AlgorithmClassifyEnum.Primary, AlgorithmStrategyEnum.Main)
+    assert clazz.__name__ == "LiquidLevelRecoPrimary"
+    assert registry.name_of_code("CODE_10093") == "LiquidLevelReco"
+
+    inputs = AlgorithmInput({"colorSeries": "Red", "rangeUp": 50, "rangeDown": -30,
+                             "thresholdUpper": [335, 157], "thresholdLower": [335, 217],
+                             "column": [[325, 116], [337, 310], [346, 310], [331, 115]]})
+    key = ("LiquidLevelReco", AlgorithmClassifyEnum.Primary, AlgorithmStrategyEnum.Main)
+    with registry.lease(*key, inputs) as first:
+        pass
+    with registry.lease(*key, AlgorithmInput({**inputs, "imgPath": "other.jpg"})) as second:
+        assert second is first
+        with registry.lease(*key, inputs) as third:
+            assert third is not first
+    with registry.lease(*key, AlgorithmInput({**inputs, "rangeUp": 60})) as fourth:
+        assert fourth is not first and fourth is not third
+
+
+def test_default_registry_discovers_packages():
+    with pytest.raises(AlgorithmCheckException):
+        default_registry.get("Unknown", AlgorithmClassifyEnum.Primary, AlgorithmStrategyEnum.Main)
+    assert ("LiquidLevelReco", AlgorithmClassifyEnum.Secondary, AlgorithmStrategyEnum.Main) in default_registry.keys()
+
+
+def test_leased_object_reads_callers_image(img_path, other_path, gen_inputs, gen_instance):
+    registry = AlgorithmRegistry()
+    registry.register("LiquidLevelReco", AlgorithmClassifyEnum.Primary, AlgorithmStrategyEnum.Main,
+                      "iapp_v0.algorithm.liquid_level.ab_liquid_level_reco_primary:LiquidLevelRecoPrimary")
+    key = ("LiquidLevelReco", AlgorithmClassifyEnum.Primary, AlgorithmStrategyEnum.Main)
+    instance = gen_instance()
+    expected = [registry.create(*key, gen_inputs(path)).perform(instance) for path in (img_path, other_path)]
+    assert expected[0][1] != expected[1][1]
+
+    leased = []
+    for path, ret in zip((img_path, other_path), expected):
+        with registry.lease(*key, gen_inputs(path)) as algorithm:
+            leased.append(algorithm)
+            assert algorithm.perform(instance) == ret
+    assert leased[0] is leased[1]
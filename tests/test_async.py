@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+
+"""Tests for the asyncio execution interface."""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from iapp_v0.algorithm.base.algorithm_base import AlgorithmInstance
+from iapp_v0.algorithm.base.async_executor import AsyncAlgorithmExecutor, PROCESS
+from iapp_v0.algorithm.base.result_cache import ResultCache
+from iapp_v0.algorithm.liquid_level.change_detector import ChangeDetector
+from iapp_v0.algorithm.liquid_level.ab_liquid_level_reco_primary import LiquidLevelRecoPrimary
+from iapp_v0.constant.constant import AlgorithmClassifyEnum, AlgorithmStrategyEnum, AlgorithmOutputTypeEnum
+from iapp_v0.exceptions.custom_exception import AlgorithmCheckException
+
+instance = AlgorithmInstance(AlgorithmClassifyEnum.Primary, AlgorithmStrategyEnum.Main,
+                             AlgorithmOutputTypeEnum.ValueQuality)
+
+
+class SlowAlgorithm(object):
+    """耗时固定的伪算法, 记录并发峰值及已执行的调用"""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.running = 0
+        self.peak = 0
+        self.done = []
+        self._lock = threading.Lock()
+
+    def perform(self, _instance, frame=None):
+        with self._lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(self.seconds)
+        with self._lock:
+            self.running -= 1
+            self.done.append(frame)
+        return True, frame, (), False, None, None
+
+
+def test_perform_async_matches_perform(img_path, gen_inputs):
+    reco = LiquidLevelRecoPrimary(gen_inputs())
+    expected = reco.perform(instance)
+
+    async def main():
+        return await asyncio.gather(reco.perform_async(instance), reco.perform_async(instance, img_path))
+
+    outputs = asyncio.run(main())
+    assert all((o.ret, o.val, o.points) == expected[:3] for o in outputs)
+
+
+def test_perform_batch_async_captures_errors_and_timeouts(gen_inputs):
+    inputs = [gen_inputs(), gen_inputs(unknownParam=1), gen_inputs()]
+
+    async def main():
+        async with AsyncAlgorithmExecutor(workers=2) as executor:
+            outputs = await LiquidLevelRecoPrimary.perform_batch_async(inputs, instance, executor)
+            timed_out = await executor.perform_batch(LiquidLevelRecoPrimary, inputs[:1], instance, timeout=1e-6)
+        return outputs, timed_out
+
+    outputs, timed_out = asyncio.run(main())
+    assert outputs[0].ret is True and outputs[2].val == outputs[0].val
+    assert isinstance(outputs[1].error, AlgorithmCheckException)
+    assert isinstance(timed_out[0].error, asyncio.TimeoutError)
+
+
+def test_concurrency_limit_timeout_and_cancellation():
+    slow = SlowAlgorithm(0.1)
+
+    async def main():
+        async with AsyncAlgorithmExecutor(workers=4, max_concurrency=2) as executor:
+            await asyncio.gather(*(executor.perform(slow, instance, i) for i in range(6)))
+            assert slow.peak == 2
+
+            with pytest.raises(asyncio.TimeoutError):
+                await executor.perform(slow, instance, "timeout", timeout=0.01)
+
+            # 排队中的调用被取消后不会执行
+            running = asyncio.create_task(executor.perform(slow, instance, "a"))
+            queued = asyncio.create_task(executor.perform(slow, instance, "b"))
+            blocked = asyncio.create_task(executor.perform(slow, instance, "c"))
+            await asyncio.sleep(0.02)
+            blocked.cancel()
+            await running
+            await queued
+
+    asyncio.run(main())
+    assert "c" not in slow.done
+
+
+def test_process_executor(gen_inputs):
+    reco = LiquidLevelRecoPrimary(gen_inputs())
+
+    async def main():
+        async with AsyncAlgorithmExecutor(PROCESS, workers=1) as executor:
+            return await executor.perform(reco, instance)
+
+    output = asyncio.run(main())
+    assert (output.ret, output.val) == reco.perform(instance)[:2]
+
+
+def test_process_executor_with_cache_and_change_detector(gen_inputs):
+    reco = LiquidLevelRecoPrimary(gen_inputs())
+    reco.result_cache = ResultCache()
+    reco.change_detector = ChangeDetector()
+
+    async def main():
+        async with AsyncAlgorithmExecutor(PROCESS, workers=1) as executor:
+            return await executor.perform(reco, instance)
+
+    output = asyncio.run(main())
+    assert (output.ret, output.val) == reco.perform(instance)[:2]
+    # 本进程中的缓存与变化检测不受影响
+    assert reco.result_cache is not None and reco.change_detector is not None
+    assert len(reco.result_cache) == 1
@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+
+"""Tests for batch execution of algorithms."""
+from iapp_v0.algorithm.base.algorithm_base import AlgorithmInstance
+from iapp_v0.algorithm.liquid_level.ab_liquid_level_reco_secondary import LiquidLevelRecoSecondary
+from iapp_v0.constant.constant import AlgorithmClassifyEnum, AlgorithmStrategyEnum, AlgorithmOutputTypeEnum
+from iapp_v0.exceptions.custom_exception import AlgorithmCheckException
+
+
+def test_perform_batch_keeps_order_and_captures_errors(gen_inputs):
+    instance = AlgorithmInstance(AlgorithmClassifyEnum.Secondary, AlgorithmStrategyEnum.Main,
+                                 AlgorithmOutputTypeEnum.ValueQuality)
+    inputs = [gen_inputs(), gen_inputs(unknownParam=1), gen_inputs("not_exists.jpg"), gen_inputs()]
+
+    outputs = LiquidLevelRecoSecondary.perform_batch(inputs, instance, workers=2)
+
+    assert len(outputs) == len(inputs)
+    assert outputs[0].ret is True and outputs[0].error is None
+    assert outputs[1].ret is False and isinstance(outputs[1].error, AlgorithmCheckException)
+    assert outputs[2].ret is False
+    assert outputs[3].val == outputs[0].val
+
+
+def test_perform_batch_inline(gen_inputs):
+    instance = AlgorithmInstance(AlgorithmClassifyEnum.Secondary, AlgorithmStrategyEnum.Main,
+                                 AlgorithmOutputTypeEnum.ValueQuality)
+    outputs = LiquidLevelRecoSecondary.perform_batch([gen_inputs()], instance, workers=1)
+
+    assert outputs[0].ret is True
+
+
+def test_perform_batch_isolates_missing_gauge_param(gen_inputs):
+    instance = AlgorithmInstance(AlgorithmClassifyEnum.Secondary, AlgorithmStrategyEnum.Main,
+                                 AlgorithmOutputTypeEnum.ValueQuality)
+    inputs = [gen_inputs(), gen_inputs(), gen_inputs()]
+    del inputs[1]["thresholdUpper"]
+
+    for workers in (1, 2):
+        outputs = LiquidLevelRecoSecondary.perform_batch(inputs, instance, workers=workers)
+        assert [output.ret for output in outputs] == [True, False, True]
+        assert isinstance(outputs[1].error, AlgorithmCheckException)
+        assert "thresholdUpper" in outputs[1].error.message
+        assert outputs[0].error is None and outputs[2].error is None
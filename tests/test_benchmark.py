@@ -0,0 +1,32 @@
+#!/usr/bin/env python
+
+"""Smoke tests for the synthetic benchmark suite."""
+import pytest
+
+from benchmarks.bench_liquid_level import STAGES, run
+from benchmarks.synthetic import LIQUID_COLORS, sight_glass
+from iapp_v0.algorithm.base.algorithm_base import AlgorithmInput, AlgorithmInstance
+from iapp_v0.algorithm.liquid_level.ab_liquid_level_reco_primary import LiquidLevelRecoPrimary
+from iapp_v0.constant.constant import AlgorithmClassifyEnum, AlgorithmStrategyEnum, AlgorithmOutputTypeEnum
+
+
+@pytest.mark.parametrize("color", list(LIQUID_COLORS))
+@pytest.mark.parametrize("level", [0.3, 0.6, 0.9])
+def test_primary_reads_synthetic_level(color, level):
+    glass = sight_glass(color=color, level=level, noise=8)
+    instance = AlgorithmInstance(AlgorithmClassifyEnum.Primary, AlgorithmStrategyEnum.Main,
+                                 AlgorithmOutputTypeEnum.ValueQuality)
+    ret, val, *_ = LiquidLevelRecoPrimary(AlgorithmInput(glass.inputs(color))).perform(instance)
+
+    assert ret is True
+    assert val == pytest.approx(glass.expected, abs=1)
+
+
+def test_benchmark_reports_every_stage():
+    results = run(((320, 240),), ("Red",), (0.0,), repeat=2)
+
+    assert len(results["cases"]) == 2
+    for case in results["cases"]:
+        classify = AlgorithmClassifyEnum.from_str(case["classify"])
+        assert case["error"] is None
+        assert list(case["stages"]) == [name for name, _ in STAGES[classify]] + ["perform"]
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+
+"""Tests for the decoded frame cache and the decode strategies of the liquid level recognition."""
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import sight_glass
+from iapp_v0.algorithm.base.algorithm_base import AlgorithmInput
+from iapp_v0.algorithm.liquid_level.ab_liquid_level_reco_primary import LiquidLevelRecoPrimary
+from iapp_v0.algorithm.liquid_level.ab_liquid_level_reco_secondary import LiquidLevelRecoSecondary
+from iapp_v0.algorithm.liquid_level.change_detector import ChangeDetector
+from iapp_v0.algorithm.liquid_level.coarse_to_fine import CoarseToFine
+from iapp_v0.constant.constant import AlgorithmClassifyEnum
+from iapp_v0.utils.frame_cache import FrameCache, frame_cache
+
+
+def test_keyed_by_path_mtime_and_mode(tmp_path):
+    path = str(tmp_path / "a.png")
+    cv2.imwrite(path, np.full((20, 30, 3), 100, np.uint8))
+    cache = FrameCache()
+
+    img = cache.imread(path)
+    assert cache.imread(path) is img
+    assert not img.flags.writeable
+    gray = cache.imread(path, cv2.IMREAD_GRAYSCALE)
+    assert gray.shape == (20, 30)
+    assert cache.stats()["hits"] == 1 and len(cache) == 2
+
+    # 文件被修改后重新解码
+    cv2.imwrite(path, np.full((20, 30, 3), 200, np.uint8))
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 10 ** 9))
+    assert cache.imread(path)[0, 0, 0] == 200
+    assert cache.imread(str(tmp_path / "missing.png")) is None
+
+
+def test_memory_cap_evicts_least_recently_used(tmp_path):
+    paths = [str(tmp_path / f"{i}.png") for i in range(3)]
+    for path in paths:
+        cv2.imwrite(path, np.zeros((100, 100, 3), np.uint8))
+    cache = FrameCache(max_bytes=2 * 100 * 100 * 3)
+
+    a, _ = cache.imread(paths[0]), cache.imread(paths[1])
+    cache.imread(paths[0])
+    cache.imread(paths[2])
+    assert cache.stats()["evictions"] == 1 and cache.nbytes == cache.max_bytes
+    assert cache.imread(paths[0]) is a
+    assert cache.stats()["hits"] == 2
+
+    # 超过上限的图像不缓存
+    assert FrameCache(max_bytes=10).imread(paths[0]).flags.writeable
+
+
+def test_recos_share_one_decode(img_path, gen_instance):
+    frame_cache.clear()
+    before = frame_cache.stats()
+    inputs = AlgorithmInput({**sight_glass().inputs(), "imgPath": img_path, "colorSeries": "Red",
+                             "column": [[325, 116], [337, 310], [346, 310], [331, 115]]})
+    outputs = [LiquidLevelRecoPrimary(inputs).perform(gen_instance()) for _ in range(3)]
+    assert outputs[0] == outputs[1] == outputs[2]
+    after = frame_cache.stats()
+    assert after["misses"] - before["misses"] == 1 and after["hits"] - before["hits"] == 2
+
+
+def test_secondary_decodes_grayscale(img_path, gen_instance):
+    inputs = AlgorithmInput({**sight_glass().inputs(), "imgPath": img_path,
+                             "column": [[325, 116], [337, 310], [346, 310], [331, 115]]})
+    reco = LiquidLevelRecoSecondary(inputs)
+    assert reco.perform(gen_instance(AlgorithmClassifyEnum.Secondary))[0] is True
+    assert reco._last_context().origin_img.ndim == 2
+    # 结果图仍为 BGR
+    assert reco.gen_result_img().shape == (576, 704, 3)
+
+
+def test_reduced_decode_with_coarse_to_fine(tmp_path, gen_instance):
+    glass = sight_glass(width=1080, height=3840, level=0.6, noise=4)
+    path = str(tmp_path / "tall.jpg")
+    cv2.imwrite(path, glass.img, [cv2.IMWRITE_JPEG_QUALITY, 95])
+    reco = LiquidLevelRecoPrimary(AlgorithmInput(glass.inputs()))
+    reco.coarse_to_fine = CoarseToFine(resolution=1.0)
+    assert reco.coarse_to_fine.decode_scale(reco._gauge) == 8
+
+    output = reco.read(path, gen_instance())
+    ctx = reco._last_context()
+    assert ctx.decode_scale == 8 and ctx.origin_img.shape == (480, 135, 3)
+    assert output.precision == pytest.approx(8 * 100 / 2688)
+    assert output.val == pytest.approx(glass.expected, abs=2 * output.precision)
+    # 坐标映射回原图
+    assert abs(output.points[0][1] - (3264 - 0.6 * 2688)) <= 2 * 8
+
+    # 已解码的数组按原分辨率处理
+    reco.read(glass.img, gen_instance())
+    assert reco._last_context().decode_scale == 1
+    reco.coarse_to_fine = CoarseToFine(resolution=1.0, reduced_decode=False)
+    assert reco.read(path, gen_instance()).precision == pytest.approx(100 / 2688)
+
+
+def test_change_detector_shares_reduced_decode(tmp_path, gen_instance):
+    glass = sight_glass(width=1080, height=3840, level=0.6, noise=4)
+    path = str(tmp_path / "tall.jpg")
+    cv2.imwrite(path, glass.img, [cv2.IMWRITE_JPEG_QUALITY, 95])
+    reco = LiquidLevelRecoPrimary(AlgorithmInput(glass.inputs()))
+    reco.coarse_to_fine = CoarseToFine(resolution=1.0)
+    expected = reco.read(path, gen_instance())
+
+    reco.change_detector = ChangeDetector(threshold=6.0, refresh_every=10)
+    instance = gen_instance()
+    frame_cache.clear()
+    before = frame_cache.stats()
+    output = reco.read(path, instance)
+    after = frame_cache.stats()
+    # 变化检测与识别共用一次降采样解码
+    assert after["misses"] - before["misses"] == 1 and after["hits"] == before["hits"]
+    assert reco._last_context().decode_scale == 8
+    assert (output.val, output.points, output.precision) == (expected.val, expected.points, expected.precision)
+    assert output.carried_forward is False
+
+    with open(path, "rb") as f:
+        assert reco.read(f.read(), instance).carried_forward is True
@@ -1,43 +1,31 @@
 #!/usr/bin/env python
 
 """Tests for `iapp_v0` package."""
-import importlib
 import os
 
 import cv2
 import pytest
 
 from iapp_v0.algorithm.base.algorithm_base import AlgorithmOutput, AlgorithmBase, AlgorithmInstance, AlgorithmInput
+from iapp_v0.algorithm.registry import registry
 from iapp_v0.constant.alarm import ExceedLimitAlarmRule, AlarmRule
 from iapp_v0.constant.constant import AlgorithmClassifyEnum, AlgorithmStrategyEnum, AlgorithmOutputTypeEnum
-from iapp_v0.exceptions.custom_exception import AlgorithmProcessException
 
 clazz_name_prefix = "LiquidLevelReco"
+img_path = os.path.join(os.path.dirname(__file__), "resources", "input", "ywj010.jpg")
 
 
 def do(classify, strategy, output_type, out_template: str = "", alarm_rule: AlarmRule = None):
     instance = AlgorithmInstance(classify, strategy, output_type, out_template=out_template, alarm_rule=alarm_rule)
 
-    inputs = AlgorithmInput({"imgPath": "E:/workspace/PycharmProjects/iapp/iapp_v0/tests/resources/input/ywj010.jpg",
+    inputs = AlgorithmInput({"imgPath": img_path,
                              "colorSeries": "Red",
                              "rangeUp": 50, "rangeDown": -30,
                              "thresholdUpper": [335, 157], "thresholdLower": [335, 217],
                              "column": [[325, 116], [337, 310], [346, 310], [331, 115]],
                              "outputType": "ValueQuality"})
 
-    liquid_reco: AlgorithmBase
-    if instance.classify == AlgorithmClassifyEnum.Primary:
-        module_primary = importlib.import_module(".liquid_level.ab_liquid_level_reco_primary",
-                                                 package="iapp_v0.algorithm")
-        clazz_ = getattr(module_primary, f"{clazz_name_prefix}{AlgorithmClassifyEnum.Primary.name}")
-        liquid_reco: AlgorithmBase = clazz_(inputs, 1)
-    elif instance.classify == AlgorithmClassifyEnum.Secondary:
-        module_secondary = importlib.import_module(".liquid_level.ab_liquid_level_reco_secondary",
-                                                   package="iapp_v0.algorithm")
-        clazz_ = getattr(module_secondary, f"{clazz_name_prefix}{AlgorithmClassifyEnum.Secondary.name}")
-        liquid_reco: AlgorithmBase = clazz_(inputs, 0)
-    else:
-        raise AlgorithmProcessException(f"Unsupported algorithm classify: {instance.classify}")
+    liquid_reco: AlgorithmBase = registry.create(clazz_name_prefix, instance.classify, instance.strategy, inputs, 1)
 
     assert liquid_reco is not None
     ret, val, points, alarm, level, desc = liquid_reco.perform(instance)
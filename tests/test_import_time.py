@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+
+"""Cold-start tests: importing the package must not pull in cv2/numpy."""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 包导入的累计耗时上限(微秒), 远低于导入 numpy + cv2 的耗时
+IMPORT_BUDGET_US = 100_000
+
+
+def run_python(code):
+    return subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                          capture_output=True, text=True, check=True)
+
+
+def test_package_import_is_lazy():
+    result = run_python("import sys, iapp_v0.algorithm.liquid_level as ll; "
+                        "print(sorted({'cv2', 'numpy'} & set(sys.modules)))")
+    assert result.stdout.strip() == "[]"
+
+    cumulative = [int(line.split("|")[1]) for line in result.stderr.splitlines()
+                  if line.rstrip().endswith("| iapp_v0.algorithm.liquid_level")]
+    assert cumulative and cumulative[0] < IMPORT_BUDGET_US
+
+
+def test_lazy_exports_resolve():
+    result = run_python("from iapp_v0.algorithm.liquid_level import LiquidLevelReco, GaugeConfig; "
+                        "from iapp_v0.constant.constant import COLOR_SERIES_RANGES, LOWER_RED1; "
+                        "from iapp_v0.algorithm.registry import registry; "
+                        "from iapp_v0.constant.constant import AlgorithmClassifyEnum as C, AlgorithmStrategyEnum as S; "
+                        "print(registry.get('LiquidLevelReco', C.Primary, S.Main).__name__, LOWER_RED1.tolist())")
+    assert result.stdout.strip() == "LiquidLevelRecoPrimary [0, 43, 46]"
+
+
+def test_star_import_exports_lazy_names():
+    result = run_python("from iapp_v0.constant.constant import *; "
+                        "print(LOWER_PURPLE.tolist(), len(COLOR_SERIES_RANGES), ColorSeriesEnum.Red.name)")
+    assert result.stdout.strip() == "[125, 43, 46] 6 Red"
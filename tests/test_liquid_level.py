@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+
+"""Tests for the liquid level recognition pipeline."""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import sight_glass
+from iapp_v0.algorithm.base.algorithm_base import AlgorithmInput
+from iapp_v0.algorithm.liquid_level.ab_liquid_level_reco_primary import LiquidLevelRecoPrimary
+from iapp_v0.algorithm.liquid_level.ab_liquid_level_reco_secondary import LiquidLevelRecoSecondary
+from iapp_v0.algorithm.liquid_level.change_detector import ChangeDetector
+from iapp_v0.algorithm.liquid_level.coarse_to_fine import CoarseToFine
+from iapp_v0.algorithm.liquid_level.gauge_config import GaugeConfig
+from iapp_v0.algorithm.liquid_level.multi_gauge import MultiGaugeReader
+from iapp_v0.constant.constant import AlgorithmClassifyEnum
+from iapp_v0.utils.debug_capture import DebugCapture
+
+
+def test_in_memory_sources(img_path, gen_inputs, gen_instance):
+    with open(img_path, "rb") as f:
+        buf = f.read()
+    frame = cv2.imread(img_path)
+
+    for clazz, classify in ((LiquidLevelRecoPrimary, AlgorithmClassifyEnum.Primary),
+                            (LiquidLevelRecoSecondary, AlgorithmClassifyEnum.Secondary)):
+        expected = clazz(gen_inputs()).perform(gen_instance(classify))
+        assert expected[0] is True
+        for src in (buf, memoryview(buf), frame):
+            assert clazz(gen_inputs(src)).perform(gen_instance(classify)) == expected
+
+
+def test_in_memory_array_is_not_copied(img_path, gen_inputs):
+    frame = cv2.imread(img_path)
+    reco = LiquidLevelRecoPrimary(gen_inputs(frame))
+
+    assert np.shares_memory(reco._originImg, frame)
+
+
+def test_debug_capture_sampling(tmp_path, gen_inputs, gen_instance):
+    reco = LiquidLevelRecoPrimary(gen_inputs(), 7)
+    reco.debug_capture = DebugCapture(str(tmp_path), sample_rate=2)
+    for _ in range(4):
+        reco.perform(gen_instance())
+    reco.debug_capture.flush()
+
+    dirs = sorted(os.listdir(tmp_path))
+    assert len(dirs) == 2
+    assert sorted(os.listdir(tmp_path / dirs[0])) == ["11_origin.jpg", "12_matchRet.jpg", "21_gray.jpg",
+                                                      "22_threshold.jpg"]
+
+
+def test_debug_capture_only_failure(tmp_path, gen_inputs, gen_instance):
+    capture = DebugCapture(str(tmp_path), only_failure=True)
+    for column in ([[325, 116], [337, 310], [346, 310], [331, 115]], [[10, 10], [10, 50], [20, 50], [20, 10]]):
+        reco = LiquidLevelRecoPrimary(gen_inputs(column=column))
+        reco.debug_capture = capture
+        reco.perform(gen_instance())
+    capture.flush()
+
+    assert len(os.listdir(tmp_path)) == 1
+
+
+def test_gauge_reused_across_frames(img_path, gen_inputs, gen_instance):
+    frame = cv2.imread(img_path)
+    inputs = gen_inputs()
+    del inputs["imgPath"]
+    gauge = GaugeConfig.from_inputs(inputs)
+    reco = LiquidLevelRecoPrimary(inputs, gauge=gauge)
+
+    expected = LiquidLevelRecoPrimary(gen_inputs()).perform(gen_instance())
+    for src in (frame, img_path, frame):
+        output = reco.read(src, gen_instance())
+        assert (output.ret, output.val, output.points) == expected[:3]
+    assert gauge.cut_mask(frame.shape)[1] is GaugeConfig.from_inputs(gen_inputs()).cut_mask(frame.shape)[1]
+    with pytest.raises(AttributeError):
+        gauge.range_up = 0
+
+
+def test_stream_video(tmp_path, img_path, gen_inputs, gen_instance):
+    frame = cv2.imread(img_path)
+    video_path = str(tmp_path / "level.avi")
+    writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*"MJPG"), 5, (frame.shape[1], frame.shape[0]))
+    for _ in range(6):
+        writer.write(frame)
+    writer.release()
+
+    reco = LiquidLevelRecoPrimary(gen_inputs())
+    outputs = list(reco.stream(video_path, gen_instance(), every_n=2))
+    assert len(outputs) == 3
+    assert all(output.ret for output in outputs)
+
+    outputs = reco.stream(iter([frame] * 4), gen_instance(), every_n=3)
+    assert sum(1 for _ in outputs) == 2
+
+
+def test_multi_gauge_read(img_path, gen_inputs, gen_instance):
+    frame = cv2.imread(img_path)
+    gauges = [(gen_inputs(), gen_instance(AlgorithmClassifyEnum.Secondary)),
+              (gen_inputs(column=[[10, 10], [10, 50], [20, 50], [20, 10]]), gen_instance()),
+              (gen_inputs(), gen_instance())]
+
+    with MultiGaugeReader(gauges, workers=3) as reader:
+        outputs = reader.read(frame)
+
+    assert [output.ret for output in outputs] == [True, False, True]
+    assert outputs[0].val == LiquidLevelRecoSecondary(gen_inputs()).perform(gauges[0][1])[1]
+    assert outputs[2].val == LiquidLevelRecoPrimary(gen_inputs()).perform(gauges[2][1])[1]
+
+
+def test_shared_object_is_reentrant(img_path, gen_inputs, gen_instance):
+    frame = cv2.imread(img_path)
+    frames = [np.roll(frame, shift, axis=0) for shift in (0, -10, -20, -30)] * 4
+    reco = LiquidLevelRecoPrimary(gen_inputs())
+    instance = gen_instance()
+    expected = [LiquidLevelRecoPrimary(gen_inputs(f)).perform(instance) for f in frames]
+    assert len({ret[1] for ret in expected}) == 4
+
+    def read(f):
+        ret = reco.perform(instance, f)
+        # 结果图使用本线程本次调用的上下文
+        return ret, reco.gen_result_img()
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(read, frames))
+
+    assert [ret for ret, _ in results] == expected
+    for f, (_, result_img) in zip(frames, results):
+        assert result_img.shape == f.shape
+    # 默认帧不受逐帧调用影响
+    assert reco.perform(instance) == expected[0]
+
+
+def test_change_detector_carries_forward_unchanged_frames(gen_instance):
+    still = [sight_glass(level=0.5, noise=4, seed=seed) for seed in range(5)]
+    moved = sight_glass(level=0.55, noise=4, seed=9)
+    reco = LiquidLevelRecoPrimary(AlgorithmInput(still[0].inputs()))
+    reco.change_detector = ChangeDetector(threshold=6.0, refresh_every=3)
+    instance = gen_instance()
+
+    outputs = [reco.read(glass.img, instance) for glass in still]
+    # 每 3 帧强制完整识别一次
+    assert [output.carried_forward for output in outputs] == [False, True, True, False, True]
+    assert len({output.val for output in outputs[:3]}) == 1
+    assert all(output.ret for output in outputs)
+
+    output = reco.read(moved.img, instance)
+    assert output.carried_forward is False
+    assert output.val == pytest.approx(moved.expected, abs=1)
+
+    # 算法实例变化时重新识别
+    assert reco.read(moved.img, gen_instance()).carried_forward is False
+
+
+def test_multi_gauge_change_detection(img_path, gen_inputs, gen_instance):
+    frame = cv2.imread(img_path)
+    gauges = [(gen_inputs(), gen_instance()),
+              (gen_inputs(column=[[10, 10], [10, 50], [20, 50], [20, 10]]), gen_instance())]
+
+    with MultiGaugeReader(gauges, workers=2, change_threshold=6.0, refresh_every=10) as reader:
+        first, second = reader.read(frame), reader.read(frame.copy())
+
+    assert [output.carried_forward for output in first] == [False, False]
+    # 识别失败的液位计不沿用结果
+    assert [output.carried_forward for output in second] == [True, False]
+    assert second[0].val == first[0].val
+
+
+@pytest.mark.parametrize("level, noise", [(0.2, 0), (0.5, 8), (0.73, 8)])
+def test_coarse_to_fine_matches_full_resolution(level, noise, gen_instance):
+    glass = sight_glass(width=1080, height=1920, level=level, noise=noise)
+    reco = LiquidLevelRecoPrimary(AlgorithmInput(glass.inputs()))
+    instance = gen_instance()
+    full = reco.read(glass.img, instance)
+
+    reco.coarse_to_fine = CoarseToFine(resolution=1.0)
+    assert reco.coarse_to_fine.factor(reco._gauge) > 1
+    coarse = reco.read(glass.img, instance)
+    # 窄带精修后与原分辨率结果一致, 精度为单个像素
+    assert coarse.points == full.points
+    assert coarse.val == full.val
+    assert coarse.precision == full.precision == pytest.approx(100 / 1344)
+
+
+def test_coarse_to_fine_factor():
+    gauge = GaugeConfig([[0, 0], [0, 2000], [50, 2000], [50, 0]], [25, 500], [25, 1500], 100, 0)
+    assert CoarseToFine(resolution=0.5).factor(gauge) == 10
+    # 缩小后液柱不低于 min_height
+    assert CoarseToFine(resolution=5).factor(gauge) == 10
+    assert CoarseToFine(resolution=5, min_height=400).factor(gauge) == 5
+    # 默认目标分辨率为量程的 0.1%
+    assert CoarseToFine().factor(gauge) == 2
+    # 目标分辨率不足一个像素时不缩小
+    assert CoarseToFine(resolution=0.01).factor(gauge) == 1
+
+
+def test_coarse_to_fine_ignored_by_secondary(gen_instance):
+    glass = sight_glass(width=1080, height=1920, level=0.5)
+    reco = LiquidLevelRecoSecondary(AlgorithmInput(glass.inputs()))
+    instance = gen_instance(AlgorithmClassifyEnum.Secondary)
+    full = reco.read(glass.img, instance)
+    reco.coarse_to_fine = CoarseToFine(resolution=1.0)
+    assert reco.read(glass.img, instance).val == full.val
+
+
+def full_frame_cut_mask(gauge, shape):
+    """未做 ROI 截取时的切图: 整图掩码, 偏移为 0"""
+    mask = np.full(tuple(shape), 255, dtype=np.uint8)
+    cv2.fillPoly(mask, np.array([gauge.box], dtype=np.int32), (0, 0, 0))
+    return np.zeros(2, dtype=np.int32), mask
+
+
+@pytest.mark.parametrize("crop", [(0, 0, None, None), (300, 100, None, None), (0, 0, 352, 316)])
+@pytest.mark.parametrize("clazz, classify", [(LiquidLevelRecoPrimary, AlgorithmClassifyEnum.Primary),
+                                             (LiquidLevelRecoSecondary, AlgorithmClassifyEnum.Secondary)])
+def test_roi_cut_matches_full_frame(img_path, gen_inputs, gen_instance, monkeypatch, crop, clazz, classify):
+    x0, y0, x1, y1 = crop
+    # 裁剪后液柱靠近图像边缘, ROI 边距被图像边界截断
+    frame = np.ascontiguousarray(cv2.imread(img_path)[y0:y1, x0:x1])
+
+    def shift(points):
+        return [[x - x0, y - y0] for x, y in points]
+
+    inputs = gen_inputs(frame, column=shift([[325, 116], [337, 310], [346, 310], [331, 115]]),
+                        thresholdUpper=shift([[335, 157]])[0], thresholdLower=shift([[335, 217]])[0])
+    instance = gen_instance(classify)
+
+    def detect(reco):
+        ctx = reco._new_context(instance, reco._inputs)
+        reco._preprocess(ctx)
+        return reco._do_detect(ctx, classify, instance.strategy)
+
+    roi = detect(clazz(inputs))
+    assert roi[0] is True
+    monkeypatch.setattr(GaugeConfig, "cut_mask", full_frame_cut_mask)
+    full = detect(clazz(inputs))
+    assert roi[1] == full[1]
+    assert np.array_equal(roi[2], full[2])
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+
+"""Tests for perform() instrumentation."""
+import pytest
+
+from iapp_v0.algorithm.base.algorithm_base import AlgorithmInstance
+from iapp_v0.algorithm.liquid_level.ab_liquid_level_reco_primary import LiquidLevelRecoPrimary
+from iapp_v0.constant.alarm import ExceedLimitAlarmRule
+from iapp_v0.constant.constant import AlgorithmClassifyEnum, AlgorithmStrategyEnum, AlgorithmOutputTypeEnum
+from iapp_v0.exceptions.custom_exception import AlgorithmCheckException
+from iapp_v0.utils.metrics import metrics, Metrics, STAGES
+
+
+@pytest.fixture
+def enabled_metrics():
+    metrics.reset()
+    metrics.enable()
+    yield metrics
+    metrics.disable()
+    metrics.reset()
+
+
+def test_disabled_metrics_record_nothing(gen_inputs):
+    metrics.reset()
+    instance = AlgorithmInstance(AlgorithmClassifyEnum.Primary, AlgorithmStrategyEnum.Main,
+                                 AlgorithmOutputTypeEnum.ValueQuality)
+    LiquidLevelRecoPrimary(gen_inputs()).perform(instance)
+
+    assert metrics.snapshot() == {"histograms": [], "counters": []}
+
+
+def test_perform_records_stages_and_counters(enabled_metrics, gen_inputs):
+    instance = AlgorithmInstance(AlgorithmClassifyEnum.Primary, AlgorithmStrategyEnum.Main,
+                                 AlgorithmOutputTypeEnum.AlarmLevel, alarm_rule=ExceedLimitAlarmRule(47, 17, -1, -15))
+    reco = LiquidLevelRecoPrimary(gen_inputs())
+    for _ in range(3):
+        reco.perform(instance)
+    reco.perform(instance, b"not an image")
+    with pytest.raises(AlgorithmCheckException):
+        LiquidLevelRecoPrimary(gen_inputs(unknownParam=1)).perform(instance)
+
+    snapshot = enabled_metrics.snapshot()
+    counts = {h["stage"]: h["count"] for h in snapshot["histograms"]}
+    assert set(counts) == set(STAGES)
+    assert counts["param_check"] == counts["decode"] == 4 and counts["alarm"] == 3
+    counters = {(c["name"], tuple(sorted(c["labels"].items()))): c["value"] for c in snapshot["counters"]}
+    labels = (("algorithm", LiquidLevelRecoPrimary._name), ("classify", "Primary"))
+    assert counters[("perform", labels + (("result", "success"),))] == 3
+    assert counters[("perform", labels + (("result", "failure"),))] == 2
+    assert sum(v for (name, _), v in counters.items() if name == "alarm") == 3
+
+    text = enabled_metrics.prometheus()
+    assert "# TYPE iapp_stage_latency_seconds histogram" in text
+    assert 'stage="detect",le="+Inf"} 3' in text
+    assert 'iapp_perform_total{algorithm="LiquidLevelReco.primary.v1",classify="Primary",result="success"} 3' in text
+
+
+def test_histogram_buckets_are_cumulative():
+    m = Metrics(buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        m.observe("a", "Primary", "detect", value)
+
+    (histogram,) = m.snapshot()["histograms"]
+    assert histogram["buckets"] == [[0.1, 1], [1.0, 3], [None, 4]]
+    assert histogram["count"] == 4 and histogram["sum"] == pytest.approx(6.05)
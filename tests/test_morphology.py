@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+
+"""Bit-exactness tests for the fused morphology pipeline and color labeling."""
+import cv2
+import numpy as np
+import pytest
+
+from iapp_v0.constant.constant import ColorSeriesEnum, COLOR_SERIES_RANGES
+from iapp_v0.utils.color_label import color_labeler
+from iapp_v0.utils.morphology import vertical_morphology
+
+
+def gray_reference(gray, H):
+    """_img_threshold 原实现"""
+    kernel = np.ones((H, 1), np.uint8)
+    dilate = cv2.dilate(gray, kernel, iterations=5)
+    erode = cv2.erode(dilate, kernel, iterations=3)
+    thre = cv2.adaptiveThreshold(erode, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, H * 2 + 1, 2)
+    dilate2 = cv2.dilate(thre, kernel, iterations=3)
+    return erode, cv2.erode(dilate2, kernel, iterations=1)
+
+
+def gray_fused(gray, H):
+    erode = vertical_morphology(H, (cv2.MORPH_DILATE, 5), (cv2.MORPH_ERODE, 3)).apply(gray)
+    thre = cv2.adaptiveThreshold(erode, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, H * 2 + 1, 2)
+    return erode, vertical_morphology(H, (cv2.MORPH_DILATE, 3), (cv2.MORPH_ERODE, 1)).apply(thre)
+
+
+def color_reference(img, H):
+    """_img_threshold_by_color 原实现(以红色为例)"""
+    kernel = np.ones((H, 1), np.uint8)
+    dilate = cv2.dilate(img, kernel, iterations=3)
+    erode = cv2.erode(dilate, kernel, iterations=3)
+    hsv = cv2.cvtColor(erode, cv2.COLOR_BGR2HSV)
+    mask = cv2.inRange(hsv, np.array([0, 43, 46]), np.array([10, 255, 255]))
+    _, thre = cv2.threshold(mask, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    dilate2 = cv2.dilate(thre, kernel, iterations=3)
+    return erode, cv2.erode(dilate2, kernel, iterations=3)
+
+
+def color_fused(img, H):
+    closing = vertical_morphology(H, (cv2.MORPH_DILATE, 3), (cv2.MORPH_ERODE, 3))
+    erode = closing.apply(img)
+    hsv = cv2.cvtColor(erode, cv2.COLOR_BGR2HSV)
+    mask = cv2.inRange(hsv, np.array([0, 43, 46]), np.array([10, 255, 255]))
+    _, thre = cv2.threshold(mask, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    return erode, closing.apply(thre)
+
+
+def gen_image(seed, channels):
+    rng = np.random.default_rng(seed)
+    shape = (int(rng.integers(20, 120)), int(rng.integers(5, 60))) + ((channels,) if channels > 1 else ())
+    img = rng.integers(0, 256, shape, dtype=np.uint8)
+    # 叠加大块色块, 使形态学结果不只是噪声
+    img[shape[0] // 3:, shape[1] // 4:shape[1] // 2] = rng.integers(0, 256, channels, dtype=np.uint8)
+    return img
+
+
+@pytest.mark.parametrize("H", [0, 1, 2, 3, 4, 7])
+@pytest.mark.parametrize("seed", range(5))
+def test_fused_morphology_is_bit_exact(H, seed):
+    gray = gen_image(seed, 1)
+    for ref, fused in zip(gray_reference(gray, max(H, 1)), gray_fused(gray, max(H, 1))):
+        np.testing.assert_array_equal(ref, fused)
+
+    img = gen_image(seed, 3)
+    for ref, fused in zip(color_reference(img, H), color_fused(img, H)):
+        np.testing.assert_array_equal(ref, fused)
+
+
+def test_runs_are_collapsed():
+    assert len(vertical_morphology(5, (cv2.MORPH_DILATE, 3), (cv2.MORPH_ERODE, 3)).steps) == 1
+    assert len(vertical_morphology(5, (cv2.MORPH_DILATE, 2), (cv2.MORPH_DILATE, 3)).steps) == 1
+    assert len(vertical_morphology(1, (cv2.MORPH_DILATE, 5), (cv2.MORPH_ERODE, 3)).steps) == 0
+
+
+@pytest.mark.parametrize("color", list(ColorSeriesEnum))
+def test_color_labeler_matches_in_range(color):
+    rng = np.random.default_rng(color.value)
+    hsv = np.dstack([rng.integers(0, 180, (60, 40)), rng.integers(0, 256, (60, 40)),
+                     rng.integers(0, 256, (60, 40))]).astype(np.uint8)
+    expected = np.zeros(hsv.shape[:2], np.uint8)
+    for lower, upper in COLOR_SERIES_RANGES[color]:
+        expected += cv2.inRange(hsv, lower, upper)
+
+    labeler = color_labeler()
+    labels = labeler.label(hsv)
+    np.testing.assert_array_equal(labeler.mask(labels, color), expected)
+    others = [c for c in ColorSeriesEnum if c != color]
+    assert not np.any(labeler.mask(labels, color) & labeler.mask(labels, *others))
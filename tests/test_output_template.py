@@ -0,0 +1,32 @@
+#!/usr/bin/env python
+
+"""Tests for compiled output templates."""
+import numpy as np
+import pytest
+
+from iapp_v0.algorithm.base.algorithm_base import AlgorithmInstance
+from iapp_v0.algorithm.base.output_template import compile_output_template
+from iapp_v0.constant.constant import AlgorithmClassifyEnum, AlgorithmStrategyEnum, AlgorithmOutputTypeEnum
+from iapp_v0.exceptions.custom_exception import AlgorithmCheckException
+
+
+def test_template_is_compiled_once():
+    assert compile_output_template("VALUE * 2") is compile_output_template("VALUE * 2")
+    assert compile_output_template("VALUE * 2").evaluate(True, 3, None) == 6
+
+
+@pytest.mark.parametrize("template", ["VALUE *", "__import__('os')", "VALUE.__class__", "abs(VALUE)"])
+def test_invalid_template_fails_on_instance_creation(template):
+    with pytest.raises(AlgorithmCheckException):
+        AlgorithmInstance(AlgorithmClassifyEnum.Primary, AlgorithmStrategyEnum.Main,
+                          AlgorithmOutputTypeEnum.ByTemplate, out_template=template)
+
+
+def test_evaluate_many():
+    status = [True, False, True]
+    values = [1.0, 2.0, 3.0]
+
+    np.testing.assert_array_equal(compile_output_template("VALUE * 10").evaluate_many(status, values),
+                                  [10.0, 2.0, 30.0])
+    ret = compile_output_template("'H' if ALEVEL == 'H' else VALUE").evaluate_many(status, values, ["H", None, None])
+    assert list(ret) == ["H", 2.0, 3.0]
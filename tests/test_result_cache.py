@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+
+"""Tests for the content-addressed result cache."""
+import functools
+import time
+
+import cv2
+import pytest
+
+from iapp_v0.algorithm.base.result_cache import ResultCache
+from iapp_v0.algorithm.liquid_level.ab_liquid_level_reco_primary import LiquidLevelRecoPrimary
+from iapp_v0.constant.alarm import ExceedLimitAlarmRule
+from iapp_v0.constant.constant import AlgorithmOutputTypeEnum
+from iapp_v0.utils.frame_cache import frame_cache
+from iapp_v0.utils.utils import ImageUtils
+
+
+@pytest.fixture
+def gen_instance(gen_instance):
+    return functools.partial(gen_instance, output_type=AlgorithmOutputTypeEnum.AlarmLevel)
+
+
+def test_hit_skips_decoding(monkeypatch, img_path, gen_inputs, gen_instance):
+    reco = LiquidLevelRecoPrimary(gen_inputs())
+    reco.result_cache = cache = ResultCache()
+    expected = LiquidLevelRecoPrimary(gen_inputs()).perform(gen_instance())
+
+    decoded = []
+    imread = ImageUtils.imread
+    monkeypatch.setattr(ImageUtils, "imread", lambda src, *args: decoded.append(src) or imread(src, *args))
+    # 清空进程内已解码图像缓存, 保证首次读取时实际解码
+    frame_cache.clear()
+
+    with open(img_path, "rb") as f:
+        buf = f.read()
+    # 文件路径与其内容命中同一条缓存
+    assert reco.perform(gen_instance(), img_path) == expected
+    assert reco.perform(gen_instance(), buf) == expected
+    assert reco.perform(gen_instance(), bytearray(buf)) == expected
+    assert len(decoded) == 1
+    assert reco.gen_result_img() is None
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1
+
+    # 默认帧与上面的文件内容一致, 直接命中; 数组按像素内容单独缓存
+    assert reco.perform(gen_instance()) == expected
+    frame = cv2.imread(img_path)
+    assert reco.perform(gen_instance(), frame) == expected
+    assert reco.perform(gen_instance(), frame.copy()) == expected
+    assert cache.stats()["hits"] == 4 and len(decoded) == 2
+
+
+def test_key_covers_inputs_and_instance(other_path, gen_inputs, gen_instance):
+    cache = ResultCache()
+    reco = LiquidLevelRecoPrimary(gen_inputs())
+    reco.result_cache = cache
+    reco.perform(gen_instance())
+    reco.perform(gen_instance(alarm_rule=ExceedLimitAlarmRule(47, 17, -1, -15)))
+    reco.perform(gen_instance(alarm_rule=ExceedLimitAlarmRule(47, 17, -1, -20)))
+    reco.perform(gen_instance(), other_path)
+
+    other = LiquidLevelRecoPrimary(gen_inputs(rangeUp=60))
+    other.result_cache = cache
+    assert other.perform(gen_instance())[1] != reco.perform(gen_instance())[1]
+    assert cache.stats()["misses"] == 5 and cache.stats()["hits"] == 1
+
+
+def test_lru_and_ttl():
+    cache = ResultCache(max_entries=2, ttl=0.05)
+    cache.put(b"a", 1)
+    cache.put(b"b", 2)
+    assert cache.get(b"a") == 1
+    cache.put(b"c", 3)
+    assert cache.get(b"b") is None and cache.get(b"a") == 1 and len(cache) == 2
+
+    time.sleep(0.06)
+    assert cache.get(b"a") is None
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["expirations"] == 1 and stats["size"] == 1
+
+
+def test_unreadable_source_is_not_cached(gen_inputs, gen_instance):
+    reco = LiquidLevelRecoPrimary(gen_inputs())
+    reco.result_cache = cache = ResultCache()
+
+    assert reco.perform(gen_instance(), "not_exists.jpg")[0] is False
+    assert len(cache) == 0
+
+
+def test_default_source_overwritten(tmp_path, img_path, other_path, gen_inputs, gen_instance):
+    path = str(tmp_path / "cam.jpg")
+    with open(img_path, "rb") as src, open(path, "wb") as dst:
+        dst.write(src.read())
+    reco = LiquidLevelRecoPrimary(gen_inputs(path))
+    reco.result_cache = ResultCache()
+    first = reco.perform(gen_instance())
+
+    # 覆盖默认图像源后按新内容重新识别, 与新建对象结果一致
+    with open(other_path, "rb") as src, open(path, "wb") as dst:
+        dst.write(src.read())
+    assert reco.perform(gen_instance()) == LiquidLevelRecoPrimary(gen_inputs(path)).perform(gen_instance())
+    assert reco.perform(gen_instance()) != first
+    assert not hasattr(reco, "_sourceDigest")
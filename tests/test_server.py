@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+
+"""Tests for the local inference server."""
+import http.client
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+import pytest
+
+from iapp_v0.algorithm.base.algorithm_base import AlgorithmInstance, AlgorithmInput
+from iapp_v0.algorithm.liquid_level.ab_liquid_level_reco_primary import LiquidLevelRecoPrimary
+from iapp_v0.constant.alarm import ExceedLimitAlarmRule
+from iapp_v0.constant.constant import AlgorithmClassifyEnum, AlgorithmStrategyEnum, AlgorithmOutputTypeEnum
+from iapp_v0.server import AlgorithmHTTPServer
+
+params = {"colorSeries": "Red",
+          "rangeUp": 50, "rangeDown": -30,
+          "thresholdUpper": [335, 157], "thresholdLower": [335, 217],
+          "column": [[325, 116], [337, 310], [346, 310], [331, 115]],
+          "outputType": "AlarmLevel"}
+
+
+def gen_query(**kwargs):
+    query = {k: v if isinstance(v, str) else json.dumps(v) for k, v in {**params, **kwargs}.items()}
+    return urlencode(query)
+
+
+@pytest.fixture
+def server():
+    server = AlgorithmHTTPServer(("127.0.0.1", 0), workers=2, batch_window=0.05, max_body_size=1 << 20)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def request(conn, method, path, body=None):
+    conn.request(method, path, body=body)
+    response = conn.getresponse()
+    return response.status, json.loads(response.read())
+
+
+def test_identify_with_keep_alive(server, img_path):
+    with open(img_path, "rb") as f:
+        image = f.read()
+    instance = AlgorithmInstance(AlgorithmClassifyEnum.Primary, AlgorithmStrategyEnum.Main,
+                                 AlgorithmOutputTypeEnum.AlarmLevel, alarm_rule=ExceedLimitAlarmRule(47, 17, -1, -15))
+    expected = LiquidLevelRecoPrimary(AlgorithmInput({**params, "imgPath": img_path})).perform(instance)
+
+    conn = http.client.HTTPConnection(*server.server_address)
+    path = "/identify/CODE_10093?" + gen_query(alarmRule="[47, 17, -1, -15]")
+    for _ in range(2):
+        status, body = request(conn, "POST", path, image)
+        assert status == 200
+        assert (body["ret"], body["val"]) == expected[:2]
+        assert (body["alarm"], body["level"]) == expected[3:5]
+
+    status, body = request(conn, "POST", "/identify/CODE_10093?" + gen_query(unknownParam=1), image)
+    assert status == 400 and "unknownParam" in body["error"]
+    status, _ = request(conn, "POST", "/identify/CODE_0?" + gen_query(), image)
+    assert status == 404
+    status, _ = request(conn, "POST", "/identify/CODE_10093?" + gen_query(), b"")
+    assert status == 400
+
+    status, metrics = request(conn, "GET", "/metrics")
+    assert status == 200
+    # 参数校验不通过的请求不入队
+    assert metrics["requests"] == 2 and metrics["queue_depth"] == 0 and metrics["in_flight"] == 0
+    assert metrics["latency_ms"]["max"] > 0
+    conn.close()
+
+
+def test_concurrent_requests_are_micro_batched(server, img_path):
+    with open(img_path, "rb") as f:
+        image = f.read()
+    path = "/identify/CODE_10093?" + gen_query()
+
+    def post(_):
+        conn = http.client.HTTPConnection(*server.server_address)
+        try:
+            return request(conn, "POST", path, image)
+        finally:
+            conn.close()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(post, range(8)))
+
+    assert all(status == 200 and body["ret"] is True for status, body in results)
+    assert len({body["val"] for _, body in results}) == 1
+    assert server.batcher.snapshot()["batches"] < 8
+
+
+def test_bad_params_get_json_errors(server, img_path):
+    with open(img_path, "rb") as f:
+        image = f.read()
+    conn = http.client.HTTPConnection(*server.server_address)
+    query = urlencode({k: json.dumps(v) for k, v in params.items() if k != "column"})
+    status, body = request(conn, "POST", "/identify/CODE_10093?" + query, image)
+    assert status == 400 and "column" in body["error"]
+
+    status, body = request(conn, "POST", "/identify/CODE_10093?" + gen_query(colorSeries="Pink"), image)
+    assert status == 400 and "Pink" in body["error"]
+
+    # 连接保持可用
+    status, body = request(conn, "POST", "/identify/CODE_10093?" + gen_query(), image)
+    assert status == 200 and body["ret"] is True
+    conn.close()
+
+
+@pytest.mark.parametrize("length, status", [(None, 400), ("abc", 400), ("-1", 400), (str((1 << 20) + 1), 413)])
+def test_bad_content_length(server, length, status):
+    conn = http.client.HTTPConnection(*server.server_address)
+    conn.putrequest("POST", "/identify/CODE_10093?" + gen_query())
+    if length is not None:
+        conn.putheader("Content-Length", length)
+    conn.endheaders()
+    response = conn.getresponse()
+    assert response.status == status and json.loads(response.read())["error"]
+    conn.close()
+
+
+def test_internal_error_is_json_500(server, img_path, monkeypatch):
+    def perform(self, instance, frame=None):
+        raise TypeError("boom")
+
+    monkeypatch.setattr(LiquidLevelRecoPrimary, "perform", perform)
+    with open(img_path, "rb") as f:
+        image = f.read()
+    conn = http.client.HTTPConnection(*server.server_address)
+    status, body = request(conn, "POST", "/identify/CODE_10093?" + gen_query(), image)
+    assert status == 500 and "boom" in body["error"]
+    conn.close()